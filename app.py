@@ -1,22 +1,44 @@
+import time
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 from datetime import date
-from data import get_fgi_history, get_btc_history, align_series
-from backtest import run_backtest
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit.runtime.scriptrunner.script_requests import ScriptRequestType
+from data import (PANEL_PATH, LRUCache, btc_cache, cache_status, datasets, fgi_cache, get_aligned_cached,
+                  get_btc_cached, get_fgi_cached, source_health)
+from backtest import cache_key, run_backtest
+from charts import CHART_WIDTH_PX, equity_figure
+from export import EXPORT_FORMATS, LARGE_EXPORT_ROWS, build_export
 
 st.set_page_config(page_title="FGI Backtest", layout="wide", page_icon="📊")
 
+# Limite de memória (MB) de cada camada do cache de resultados
+RESULT_CACHE_MB = {"btc": 64, "align": 64, "backtest": 128, "export": 128}
+
+# Modo ao vivo: espera (s) após a última mudança de parâmetro antes de recalcular,
+# conferindo a cada LIVE_POLL_S se já chegou um valor mais novo
+LIVE_DEBOUNCE_S = 0.25
+LIVE_POLL_S = 0.02
+
+@st.cache_resource
+def result_caches():
+    """
+    Camadas do cache de resultados (LRU limitado por memória), uma por processo,
+    compartilhadas por todas as sessões: recorte de BTC, série alinhada, backtest
+    e arquivos de exportação.
+    """
+    return {name: LRUCache(mb * 2**20, name=name) for name, mb in RESULT_CACHE_MB.items()}
+
+caches = result_caches()
+
 st.title("📊 Backtest Fear & Greed Index (Bitcoin)")
 st.markdown("---")
 
-# 📌 Carregar dados do FGI (via CSV GitHub) com cache
-@st.cache_data(ttl=3600)  # Cache por 1 hora
-def load_fgi_data():
-    return get_fgi_history()
-
+# 📌 Carregar dados do FGI (cache stale-while-revalidate: só o warm-up espera a rede,
+# depois o último dataset é servido na hora e atualizado em segundo plano)
 with st.spinner("Carregando dados do Fear & Greed Index..."):
-    fgi = load_fgi_data()
+    fgi = get_fgi_cached()
 
 if not fgi.empty:
     col1, col2, col3 = st.columns(3)
@@ -28,87 +50,103 @@ if not fgi.empty:
         st.metric("🔴 FGI Atual", f"{fgi['FGI'].iloc[-1]:.0f}")
     
     st.success("✅ Dados do Fear & Greed Index carregados do GitHub")
+    fgi_status = fgi_cache.status()
+    if fgi_status["age_seconds"] is not None:
+        st.caption(
+            f"🕒 Dados carregados há {fgi_status['age_seconds'] / 60:.0f} min · versão {fgi_status['version']}"
+            + (" · atualizando em segundo plano" if fgi_status["refreshing"] else "")
+        )
 else:
     st.error("⚠️ Não foi possível carregar os dados do FGI")
     st.stop()
 
 st.markdown("---")
 
-# 📌 Inputs do usuário
-col_sidebar1, col_sidebar2 = st.columns([1, 3])
+def _superseded() -> bool:
+    """
+    True se já há um rerun mais novo na fila desta sessão (ex.: o slider mudou de novo).
 
-with col_sidebar1:
-    st.subheader("⚙️ Parâmetros")
-    
-    # Datas
-    st.markdown("**📅 Período**")
-    start_date = st.date_input("Data inicial", value=date(2020, 1, 1), key="start")
-    end_date = st.date_input("Data final", value=date.today(), key="end")
-    
-    # Thresholds
-    st.markdown("**🎯 Estratégia**")
-    buy_threshold = st.slider("Comprar se FGI ≤", 0, 100, 30, help="Valores baixos = medo extremo")
-    sell_threshold = st.slider("Vender se FGI ≥", 0, 100, 70, help="Valores altos = ganância")
-    
-    # Taxa
-    st.markdown("**💰 Custos**")
-    trade_fee = st.number_input("Taxa por trade (%)", 0.0, 5.0, 0.1, step=0.05)
-    
-    # Botão
-    run_button = st.button("▶️ Rodar Backtest", type="primary", use_container_width=True)
+    No Streamlit 1.36 o rerun de um widget dentro do fragmento não cancela a execução
+    em andamento (ScriptRequests.on_scriptrunner_yield ignora reruns de fragmento):
+    ele espera o fragmento terminar. O modo ao vivo consulta a fila antes das etapas
+    caras para abandonar a execução obsoleta.
+    """
+    requests = getattr(get_script_run_ctx(), "script_requests", None)
+    return getattr(requests, "_state", None) == ScriptRequestType.RERUN
 
-with col_sidebar2:
-    st.subheader("📈 Resultados")
-    
-    if run_button:
-        # 🔍 SEÇÃO DE DEBUG
-        with st.expander("🔍 Debug: Log de Carregamento", expanded=True):
-            debug_output = st.empty()
-            
-        with st.spinner("📡 Baixando dados do Bitcoin..."):
-            # Carregar dados BTC
-            btc = get_btc_history(start_date, end_date)
+def load_btc(start_date, end_date):
+    """
+    Recorte de BTC do período, servido do cache de resultados.
+    """
+    return caches["btc"].get_or_compute(
+        None if btc_cache.version is None else (btc_cache.version, start_date, end_date),
+        lambda: get_btc_cached(start_date, end_date),
+    )
+
+def load_aligned(start_date, end_date):
+    """
+    Recorte do painel pré-alinhado (o join só é refeito quando os dados mudam),
+    servido do cache de resultados.
+    """
+    versions = (fgi_cache.version, btc_cache.version)
+    return caches["align"].get_or_compute(
+        None if None in versions else (*versions, start_date, end_date),
+        lambda: get_aligned_cached(start_date, end_date, PANEL_PATH),
+    )
+
+# 🔍 SEÇÃO DE DEBUG: carregamento dos dados do período do último backtest.
+# Fica fora do fragmento abaixo, então só é refeita num rerun completo
+# (ao rodar um período novo), não a cada mudança de parâmetro.
+if "run_params" in st.session_state:
+    start_date, end_date = st.session_state["run_params"][:2]
+
+    with st.expander("🔍 Debug: Log de Carregamento", expanded=False):
+        debug_output = st.empty()
+        
+    with st.spinner("📡 Baixando dados do Bitcoin..."):
+        # Carregar dados BTC
+        btc = load_btc(start_date, end_date)
+        
+        # Debug BTC
+        with debug_output.container():
+            st.markdown("#### 📊 Status do carregamento:")
             
-            # Debug BTC
-            with debug_output.container():
-                st.markdown("#### 📊 Status do carregamento:")
-                
-                col_d1, col_d2 = st.columns(2)
-                with col_d1:
-                    st.markdown("**FGI Data:**")
-                    if not fgi.empty:
-                        st.success(f"✅ {len(fgi)} dias carregados")
-                        st.caption(f"Período: {fgi.index.min().date()} até {fgi.index.max().date()}")
-                    else:
-                        st.error("❌ FGI vazio")
-                
-                with col_d2:
-                    st.markdown("**BTC Data:**")
-                    if not btc.empty:
-                        st.success(f"✅ {len(btc)} dias carregados")
-                        st.caption(f"Período: {btc.index.min().date()} até {btc.index.max().date()}")
-                    else:
-                        st.error("❌ BTC vazio")
-                        st.warning("**Possíveis causas:**")
-                        st.markdown("""
-                        - ⚠️ Yahoo Finance offline
-                        - ⚠️ Período sem dados
-                        - ⚠️ Problema de conexão
-                        """)
+            col_d1, col_d2 = st.columns(2)
+            with col_d1:
+                st.markdown("**FGI Data:**")
+                if not fgi.empty:
+                    st.success(f"✅ {len(fgi)} dias carregados")
+                    st.caption(f"Período: {fgi.index.min().date()} até {fgi.index.max().date()}")
+                else:
+                    st.error("❌ FGI vazio")
             
-            if btc.empty:
-                st.error("❌ Não foi possível carregar dados do Bitcoin")
-                st.info("💡 **Soluções:**")
-                st.markdown("""
-                1. Verifique sua conexão com a internet
-                2. Tente um período diferente (ex: últimos 365 dias)
-                3. Aguarde alguns minutos e tente novamente
-                4. Verifique os logs no terminal/console
-                """)
-                st.stop()
+            with col_d2:
+                st.markdown("**BTC Data:**")
+                if not btc.empty:
+                    st.success(f"✅ {len(btc)} dias carregados")
+                    st.caption(f"Período: {btc.index.min().date()} até {btc.index.max().date()}")
+                else:
+                    st.error("❌ BTC vazio")
+                    st.warning("**Possíveis causas:**")
+                    st.markdown("""
+                    - ⚠️ Yahoo Finance offline
+                    - ⚠️ Período sem dados
+                    - ⚠️ Problema de conexão
+                    """)
         
+        if btc.empty:
+            st.error("❌ Não foi possível carregar dados do Bitcoin")
+            st.info("💡 **Soluções:**")
+            st.markdown("""
+            1. Verifique sua conexão com a internet
+            2. Tente um período diferente (ex: últimos 365 dias)
+            3. Aguarde alguns minutos e tente novamente
+            4. Verifique os logs no terminal/console
+            """)
+    
+    if not btc.empty:
         with st.spinner("🔗 Alinhando séries temporais..."):
-            df = align_series(fgi, btc, start_date, end_date)
+            df = load_aligned(start_date, end_date)
             
             # Debug do alinhamento
             with debug_output.container():
@@ -141,14 +179,87 @@ with col_sidebar2:
                     else:
                         st.info(f"✅ Sobreposição detectada: {overlap_start} até {overlap_end}")
                         st.warning("⚠️ Mas o alinhamento retornou vazio. Verifique os logs do terminal.")
-                    
-                    st.stop()
                 else:
                     st.success(f"✅ {len(df)} dias alinhados com sucesso")
-                    st.caption(f"Período final: {df.index.min().date()} até {df.index.max().date()}")
+                    st.caption(f"Período final: {df.index.min().date()} até {df.index.max().date()} · versão dos dados {df.attrs.get('data_version', '-')}")
+
+# Fragmento: mexer nos parâmetros ou exportar reroda só esta seção (parâmetros,
+# backtest e gráficos); cabeçalho, debug e diagnóstico não são refeitos
+fragment = getattr(st, "fragment", None) or st.experimental_fragment
+
+@fragment
+def backtest_section():
+    """
+    Parâmetros, resultados e exportação do backtest.
+    """
+    # 📌 Inputs do usuário
+    col_sidebar1, col_sidebar2 = st.columns([1, 3])
+
+    with col_sidebar1:
+        st.subheader("⚙️ Parâmetros")
+        
+        # Datas
+        st.markdown("**📅 Período**")
+        start_date = st.date_input("Data inicial", value=date(2020, 1, 1), key="start")
+        end_date = st.date_input("Data final", value=date.today(), key="end")
+        
+        # Thresholds
+        st.markdown("**🎯 Estratégia**")
+        buy_threshold = st.slider("Comprar se FGI ≤", 0, 100, 30, help="Valores baixos = medo extremo")
+        sell_threshold = st.slider("Vender se FGI ≥", 0, 100, 70, help="Valores altos = ganância")
+        
+        # Taxa
+        st.markdown("**💰 Custos**")
+        trade_fee = st.number_input("Taxa por trade (%)", 0.0, 5.0, 0.1, step=0.05)
+        
+        # Modo ao vivo (opcional): recalcula a cada mudança, sem clicar em Rodar
+        live_mode = st.toggle("⚡ Modo ao vivo", key="live_mode",
+                              help="Recalcula o backtest a cada mudança dos parâmetros")
+        
+        # Botão
+        run_button = st.button("▶️ Rodar Backtest", type="primary", use_container_width=True)
+
+    with col_sidebar2:
+        st.subheader("📈 Resultados")
+        
+        # O último backtest continua na tela nos reruns seguintes (ex.: exportação),
+        # servido do cache de resultados, com os parâmetros com que foi rodado
+        current = (start_date, end_date, buy_threshold, sell_threshold, trade_fee)
+        previous = st.session_state.get("run_params")
+        if live_mode:
+            st.caption("⚡ Modo ao vivo: recalculando a cada mudança de parâmetro")
+            if current != previous:
+                # Debounce: dá tempo para o slider parar antes de recalcular; se chegar
+                # um valor mais novo, esta execução (obsoleta) é abandonada sem calcular
+                deadline = time.monotonic() + LIVE_DEBOUNCE_S
+                while time.monotonic() < deadline:
+                    if _superseded():
+                        return
+                    time.sleep(LIVE_POLL_S)
+        
+        if run_button or (live_mode and current != previous):
+            st.session_state["run_params"] = current
+            if previous is None or previous[:2] != current[:2]:
+                # Período novo: rerun completo para recarregar os dados e o debug
+                st.rerun()
+        
+        if "run_params" not in st.session_state:
+            return
+        start_date, end_date, buy_threshold, sell_threshold, trade_fee = st.session_state["run_params"]
+        
+        df = load_aligned(start_date, end_date)
+        if df.empty:
+            st.error("❌ Nenhum dado para o período. Veja o log de carregamento acima.")
+            return
 
         with st.spinner("🧮 Executando backtest..."):
-            results, trades = run_backtest(df, buy_threshold, sell_threshold, trade_fee)
+            results, trades, details = caches["backtest"].get_or_compute(
+                cache_key(df, buy_threshold, sell_threshold, trade_fee),
+                lambda: run_backtest(df, buy_threshold, sell_threshold, trade_fee, details=True),
+            )
+            if live_mode and _superseded():
+                # Parâmetros mudaram de novo durante o cálculo: não desenha resultados obsoletos
+                return
 
             # 📊 Métricas principais
             st.markdown("### 💵 Performance")
@@ -196,6 +307,13 @@ with col_sidebar2:
             
             st.plotly_chart(fig, use_container_width=True)
 
+            # 📉 Curvas de capital e drawdown (LTTB + WebGL: payload limitado pela largura)
+            st.markdown("### 📉 Capital e Drawdown")
+            chart_width = st.select_slider("Resolução do gráfico (px)", [600, 900, CHART_WIDTH_PX, 1800, 2400],
+                                           value=CHART_WIDTH_PX, key="chart_width")
+            st.plotly_chart(equity_figure(details["curves"], details["drawdown"], trades, chart_width),
+                            use_container_width=True)
+
             # 📊 Tabela de resultados
             st.markdown("### 📋 Tabela Comparativa")
             st.dataframe(results, use_container_width=True, hide_index=True)
@@ -207,22 +325,44 @@ with col_sidebar2:
             else:
                 st.info("Nenhum trade executado no período selecionado")
 
-            # 📥 Exportar para Excel
+            # 📥 Exportar (montado em memória só quando pedido; CSV zip para períodos grandes)
             st.markdown("### 📥 Exportar Resultados")
-            output_excel = "backtest_results.xlsx"
-            with pd.ExcelWriter(output_excel, engine="openpyxl") as writer:
-                results.to_excel(writer, sheet_name="Resumo", index=False)
-                trades.to_excel(writer, sheet_name="Trades", index=False)
-                df.to_excel(writer, sheet_name="Dados")
+            col_fmt, col_prepare = st.columns([2, 1])
+            with col_fmt:
+                export_format = st.radio("Formato", list(EXPORT_FORMATS), horizontal=True,
+                                         index=int(len(df) > LARGE_EXPORT_ROWS))
+            export_key = cache_key(df, buy_threshold, sell_threshold, trade_fee, export_format)
+            with col_prepare:
+                if st.button("📦 Preparar arquivo", use_container_width=True):
+                    st.session_state["export_requested"] = export_key
 
-            with open(output_excel, "rb") as f:
+            if st.session_state.get("export_requested", False) == export_key:
+                with st.spinner("📦 Gerando arquivo..."):
+                    payload = caches["export"].get_or_compute(
+                        export_key, lambda: build_export(export_format, results, trades, df)
+                    )
+                extension, mime = EXPORT_FORMATS[export_format]
                 st.download_button(
-                    label="📥 Baixar resultados em Excel",
-                    data=f,
-                    file_name=f"backtest_fgi_{start_date}_{end_date}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    label=f"📥 Baixar resultados ({export_format})",
+                    data=payload,
+                    file_name=f"backtest_fgi_{start_date}_{end_date}.{extension}",
+                    mime=mime,
                     use_container_width=True
                 )
 
+backtest_section()
+
+# 🩺 Diagnóstico: caches, datasets e saúde das fontes
+with st.expander("🩺 Diagnóstico"):
+    st.markdown("**Cache de resultados (LRU)**")
+    st.dataframe(pd.DataFrame([cache.status() for cache in caches.values()]),
+                 use_container_width=True, hide_index=True)
+    st.markdown("**Datasets (stale-while-revalidate)**")
+    st.dataframe(pd.DataFrame(cache_status()), use_container_width=True, hide_index=True)
+    st.markdown("**Registro de datasets compartilhados**")
+    st.dataframe(pd.DataFrame(datasets.status()), use_container_width=True, hide_index=True)
+    st.markdown("**Saúde das fontes**")
+    st.dataframe(pd.DataFrame(source_health()), use_container_width=True, hide_index=True)
+
 st.markdown("---")
 st.caption("📊 Dados atualizados diariamente via GitHub Actions | Fear & Greed Index by Alternative.me")
@@ -1,14 +1,49 @@
 import pandas as pd
 import numpy as np
+import json
+import math
+import os
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 
-def run_backtest(df, buy_threshold=30, sell_threshold=70, fee=0.1):
+INITIAL_CASH = 1000.0  # capital inicial em USD
+ENGINES = ("numpy", "loop")
+
+def run_backtest(df, buy_threshold=30, sell_threshold=70, fee=0.1, engine="numpy", details=False):
     """
     Backtest baseado no Fear & Greed Index.
     Compra se FGI <= buy_threshold, vende se FGI >= sell_threshold.
     Também calcula o retorno do Buy & Hold no mesmo período.
+
+    engine:
+        "numpy" - máquina de estados sobre arrays (padrão, rápida)
+        "loop"  - implementação original linha a linha com iterrows
+    Ambas retornam exatamente os mesmos resultados e trades.
+
+    details=True retorna também um dict com as curvas de portfolio
+    ("curves": DataFrame estratégia x Buy & Hold) e as estatísticas de
+    drawdown de cada curva ("drawdown", ver drawdown_stats).
     """
+    if engine == "numpy":
+        trades, portfolio_values, final_value = _simulate_numpy(df, buy_threshold, sell_threshold, fee)
+    elif engine == "loop":
+        trades, portfolio_values, final_value = _simulate_loop(df, buy_threshold, sell_threshold, fee)
+    else:
+        raise ValueError(f"Engine desconhecida: {engine!r} (use {', '.join(ENGINES)})")
 
-    cash = 1000.0  # capital inicial em USD
+    results, trades_df, extra = _summarize(df, trades, portfolio_values, final_value)
+    if details:
+        return results, trades_df, extra
+    return results, trades_df
+
+def _simulate_loop(df, buy_threshold, sell_threshold, fee):
+    """
+    Simulação original: percorre o DataFrame com iterrows.
+    Retorna (trades, portfolio_values, final_value).
+    """
+    cash = INITIAL_CASH
     btc = 0.0
     trades = []
     position = None
@@ -18,7 +53,7 @@ def run_backtest(df, buy_threshold=30, sell_threshold=70, fee=0.1):
     for date, row in df.iterrows():
         price = row["Close"]
         fgi = row["FGI"]
-        
+
         # Calcula valor atual do portfolio
         current_value = cash + (btc * price if btc > 0 else 0)
         portfolio_values.append(current_value)
@@ -28,10 +63,10 @@ def run_backtest(df, buy_threshold=30, sell_threshold=70, fee=0.1):
             cash = 0.0
             position = "long"
             trades.append({
-                "date": date, 
-                "action": "BUY", 
-                "price": price, 
-                "fgi": fgi, 
+                "date": date,
+                "action": "BUY",
+                "price": price,
+                "fgi": fgi,
                 "btc": btc,
                 "portfolio_value": btc * price
             })
@@ -41,10 +76,10 @@ def run_backtest(df, buy_threshold=30, sell_threshold=70, fee=0.1):
             btc = 0.0
             position = None
             trades.append({
-                "date": date, 
-                "action": "SELL", 
-                "price": price, 
-                "fgi": fgi, 
+                "date": date,
+                "action": "SELL",
+                "price": price,
+                "fgi": fgi,
                 "cash": cash,
                 "portfolio_value": cash
             })
@@ -54,21 +89,159 @@ def run_backtest(df, buy_threshold=30, sell_threshold=70, fee=0.1):
         cash = btc * final_price * (1 - fee_rate)
         btc = 0.0
         trades.append({
-            "date": df.index[-1], 
-            "action": "FINAL SELL", 
-            "price": final_price, 
-            "fgi": df["FGI"].iloc[-1], 
+            "date": df.index[-1],
+            "action": "FINAL SELL",
+            "price": final_price,
+            "fgi": df["FGI"].iloc[-1],
+            "cash": cash,
+            "portfolio_value": cash
+        })
+
+    return trades, portfolio_values, cash
+
+def _next_true(mask):
+    """
+    Para cada posição i, índice do próximo True em mask[i:] (len(mask) se não houver).
+    O array retornado tem len(mask) + 1 elementos para permitir consultar i = len(mask).
+    """
+    n = len(mask)
+    positions = np.where(mask, np.arange(n), n)
+    nxt = np.minimum.accumulate(positions[::-1])[::-1]
+    return np.append(nxt, n)
+
+def _trade_bars(fgi, buy_threshold, sell_threshold):
+    """
+    Resolve a máquina de estados long/flat pulando direto de sinal em sinal.
+    Retorna (entradas, saídas) como listas de índices de barra; o custo é
+    O(n) vetorizado + O(número de trades) em Python.
+    """
+    next_buy = _next_true(fgi <= buy_threshold)
+    next_sell = _next_true(fgi >= sell_threshold)
+    return _walk_chain(next_buy, next_sell, len(fgi))
+
+def _walk_chain(next_buy, next_sell, n):
+    """
+    Percorre os arrays de próximo sinal (ver _next_true) alternando compra e venda.
+    """
+    entries, exits = [], []
+    i = next_buy[0]
+    while i < n:
+        entries.append(i)
+        j = next_sell[i + 1]
+        if j >= n:
+            break
+        exits.append(j)
+        i = next_buy[j + 1]
+    return entries, exits
+
+def _simulate_numpy(df, buy_threshold, sell_threshold, fee):
+    """
+    Mesma simulação de _simulate_loop, calculada sobre arrays NumPy.
+    Retorna (trades, portfolio_values, final_value).
+    """
+    dates = df.index
+    close = df["Close"].to_numpy(dtype=float)
+    fgi = df["FGI"].to_numpy(dtype=float)
+    n = len(close)
+    fee_rate = fee / 100
+
+    entries, exits = _trade_bars(fgi, buy_threshold, sell_threshold)
+
+    # Fills: mesma ordem de operações do loop para resultados bit a bit idênticos
+    cash = INITIAL_CASH
+    btc = 0.0
+    trades = []
+    events = []
+    cash_levels = [cash]
+    btc_levels = [btc]
+    for k, i in enumerate(entries):
+        price = close[i]
+        btc = (cash * (1 - fee_rate)) / price
+        cash = 0.0
+        trades.append({
+            "date": dates[i],
+            "action": "BUY",
+            "price": price,
+            "fgi": fgi[i],
+            "btc": btc,
+            "portfolio_value": btc * price
+        })
+        events.append(i)
+        cash_levels.append(cash)
+        btc_levels.append(btc)
+
+        if k < len(exits):
+            j = exits[k]
+            price = close[j]
+            cash = btc * price * (1 - fee_rate)
+            btc = 0.0
+            trades.append({
+                "date": dates[j],
+                "action": "SELL",
+                "price": price,
+                "fgi": fgi[j],
+                "cash": cash,
+                "portfolio_value": cash
+            })
+            events.append(j)
+            cash_levels.append(cash)
+            btc_levels.append(btc)
+
+    # Valor do portfolio em cada barra, antes do trade da própria barra
+    segment = np.searchsorted(np.asarray(events, dtype=np.int64), np.arange(n), side="left")
+    cash_arr = np.asarray(cash_levels)[segment]
+    btc_arr = np.asarray(btc_levels)[segment]
+    portfolio_values = cash_arr + np.where(btc_arr > 0, btc_arr * close, 0.0)
+
+    final_price = df["Close"].iloc[-1]
+    if len(entries) > len(exits):
+        cash = btc * final_price * (1 - fee_rate)
+        btc = 0.0
+        trades.append({
+            "date": dates[-1],
+            "action": "FINAL SELL",
+            "price": final_price,
+            "fgi": df["FGI"].iloc[-1],
             "cash": cash,
             "portfolio_value": cash
         })
 
+    return trades, portfolio_values, cash
+
+def _summarize(df, trades, portfolio_values, final_value):
+    """
+    Monta a tabela de resultados (estratégia vs Buy & Hold) e o DataFrame de trades.
+    """
+    # Resultado do Buy & Hold
+    start_price = df["Close"].iloc[0]
+    end_price = df["Close"].iloc[-1]
+    roi_hold = (end_price - start_price) / start_price * 100
+
+    # Curvas da estratégia e do Buy & Hold; drawdown das duas numa única passada
+    close = df["Close"].to_numpy(dtype=float)
+    curves = pd.DataFrame({
+        "FGI Strategy": np.asarray(portfolio_values, dtype=float),
+        "Buy & Hold": INITIAL_CASH * (1 + (close - start_price) / start_price),
+    }, index=df.index)
+    drawdown = drawdown_stats(curves)
+    max_dd = drawdown["FGI Strategy"]["max_drawdown"]
+    max_dd_hold = drawdown["Buy & Hold"]["max_drawdown"]
+
+    results = _results_table(trades, final_value, max_dd, roi_hold, max_dd_hold)
+    return results, _trades_frame(trades), {"curves": curves, "drawdown": drawdown}
+
+def _results_table(trades, final_value, max_dd, roi_hold, max_dd_hold):
+    """
+    Tabela comparativa estratégia vs Buy & Hold a partir das métricas já calculadas.
+    As métricas são arredondadas como np.float64 (round do NumPy), seja qual for o
+    tipo recebido: float do Python arredonda casos de meio de forma diferente.
+    """
+    final_value, max_dd, roi_hold, max_dd_hold = map(np.float64, (final_value, max_dd, roi_hold, max_dd_hold))
+
     # Resultado da estratégia
-    final_value = cash
-    roi_strategy = (final_value - 1000) / 1000 * 100
-    
-    # Calcula max drawdown
-    max_dd = calculate_max_drawdown(portfolio_values)
-    
+    roi_strategy = (final_value - INITIAL_CASH) / INITIAL_CASH * 100
+    final_hold_value = INITIAL_CASH * (1 + roi_hold / 100)
+
     # Calcula número de trades vencedores
     winning_trades = 0
     losing_trades = 0
@@ -81,31 +254,21 @@ def run_backtest(df, buy_threshold=30, sell_threshold=70, fee=0.1):
                     winning_trades += 1
                 else:
                     losing_trades += 1
-    
-    win_rate = (winning_trades / (winning_trades + losing_trades) * 100) if (winning_trades + losing_trades) > 0 else 0
 
-    # Resultado do Buy & Hold
-    start_price = df["Close"].iloc[0]
-    end_price = final_price
-    roi_hold = (end_price - start_price) / start_price * 100
-    final_hold_value = 1000 * (1 + roi_hold / 100)
-    
-    # Calcula drawdown do Buy & Hold
-    hold_values = [1000 * (1 + (price - start_price) / start_price) for price in df["Close"]]
-    max_dd_hold = calculate_max_drawdown(hold_values)
+    win_rate = (winning_trades / (winning_trades + losing_trades) * 100) if (winning_trades + losing_trades) > 0 else 0
 
-    results = pd.DataFrame([
+    return pd.DataFrame([
         {
-            "Estrategia": "FGI Strategy", 
-            "Valor Final (USD)": round(final_value, 2), 
+            "Estrategia": "FGI Strategy",
+            "Valor Final (USD)": round(final_value, 2),
             "Retorno (%)": round(roi_strategy, 2),
             "Max Drawdown (%)": round(max_dd, 2),
             "Num Trades": len(trades),
             "Win Rate (%)": round(win_rate, 1)
         },
         {
-            "Estrategia": "Buy & Hold", 
-            "Valor Final (USD)": round(final_hold_value, 2), 
+            "Estrategia": "Buy & Hold",
+            "Valor Final (USD)": round(final_hold_value, 2),
             "Retorno (%)": round(roi_hold, 2),
             "Max Drawdown (%)": round(max_dd_hold, 2),
             "Num Trades": 1,
@@ -113,29 +276,546 @@ def run_backtest(df, buy_threshold=30, sell_threshold=70, fee=0.1):
         },
     ])
 
+def _trades_frame(trades):
+    """
+    DataFrame do histórico de trades com datas formatadas.
+    """
     trades_df = pd.DataFrame(trades)
-    
+
     # Formata datas no trades
     if not trades_df.empty and "date" in trades_df.columns:
         trades_df["date"] = pd.to_datetime(trades_df["date"]).dt.strftime("%Y-%m-%d")
-    
-    return results, trades_df
+
+    return trades_df
+
+class BacktestState:
+    """
+    Estado incremental do backtest: cada nova barra é aplicada em O(1) com update().
+
+    Guarda caixa, BTC, posição, pico e max drawdown (estratégia e Buy & Hold) e o
+    histórico de trades. Aplicar as barras de um DataFrame em ordem e chamar results()
+    retorna exatamente o mesmo que run_backtest sobre esse DataFrame, então a
+    atualização diária só precisa da barra nova. save()/load() persistem em JSON.
+    """
+
+    FIELDS = (
+        "buy_threshold", "sell_threshold", "fee",
+        "cash", "btc", "position", "trades", "bars",
+        "peak", "max_dd", "start_price", "hold_peak", "hold_max_dd",
+        "last_date", "last_close", "last_fgi",
+    )
+    FLOAT_FIELDS = (
+        "cash", "btc", "peak", "max_dd", "start_price", "hold_peak", "hold_max_dd",
+        "last_close", "last_fgi",
+    )
+
+    def __init__(self, buy_threshold=30, sell_threshold=70, fee=0.1):
+        self.buy_threshold = buy_threshold
+        self.sell_threshold = sell_threshold
+        self.fee = fee
+        self.cash = INITIAL_CASH
+        self.btc = 0.0
+        self.position = None
+        self.trades = []
+        self.bars = 0
+        self.peak = None
+        self.max_dd = 0.0
+        self.start_price = None
+        self.hold_peak = None
+        self.hold_max_dd = 0.0
+        self.last_date = None
+        self.last_close = None
+        self.last_fgi = None
+
+    @classmethod
+    def from_frame(cls, df, buy_threshold=30, sell_threshold=70, fee=0.1):
+        """
+        Cria o estado aplicando todas as barras de um DataFrame alinhado (Close, FGI).
+        """
+        state = cls(buy_threshold, sell_threshold, fee)
+        state.extend(df)
+        return state
+
+    def extend(self, df):
+        """
+        Aplica em ordem as barras de df (ex.: só as datas posteriores a last_date).
+        """
+        closes = df["Close"].to_numpy(dtype=float)
+        fgis = df["FGI"].to_numpy(dtype=float)
+        for date, close, fgi in zip(df.index, closes, fgis):
+            self.update(date, close, fgi)
+        return self
+
+    def update(self, date, close, fgi):
+        """
+        Aplica uma nova barra: marca o portfolio a mercado e executa compra/venda.
+        """
+        date = pd.Timestamp(date)
+        # np.float64 como nos arrays do run_backtest (mesma aritmética e arredondamento)
+        close = np.float64(close)
+        fgi = np.float64(fgi)
+        if self.last_date is not None and date <= self.last_date:
+            raise ValueError(f"Barra fora de ordem: {date.date()} <= {self.last_date.date()}")
+
+        fee_rate = self.fee / 100
+        if self.start_price is None:
+            self.start_price = close
+
+        # Valor antes do trade da barra, como no loop do run_backtest
+        current_value = self.cash + (self.btc * close if self.btc > 0 else 0)
+        self.peak, self.max_dd = _track_drawdown(current_value, self.peak, self.max_dd)
+        hold_value = INITIAL_CASH * (1 + (close - self.start_price) / self.start_price)
+        self.hold_peak, self.hold_max_dd = _track_drawdown(hold_value, self.hold_peak, self.hold_max_dd)
+
+        if self.position is None and fgi <= self.buy_threshold:
+            self.btc = (self.cash * (1 - fee_rate)) / close
+            self.cash = 0.0
+            self.position = "long"
+            self.trades.append({
+                "date": date,
+                "action": "BUY",
+                "price": close,
+                "fgi": fgi,
+                "btc": self.btc,
+                "portfolio_value": self.btc * close
+            })
+
+        elif self.position == "long" and fgi >= self.sell_threshold:
+            self.cash = self.btc * close * (1 - fee_rate)
+            self.btc = 0.0
+            self.position = None
+            self.trades.append({
+                "date": date,
+                "action": "SELL",
+                "price": close,
+                "fgi": fgi,
+                "cash": self.cash,
+                "portfolio_value": self.cash
+            })
+
+        self.bars += 1
+        self.last_date = date
+        self.last_close = close
+        self.last_fgi = fgi
+        return self
+
+    def results(self):
+        """
+        Mesmo retorno de run_backtest (results, trades_df) sobre as barras aplicadas.
+        Uma posição aberta é vendida na última barra só no resultado; o estado não muda.
+        """
+        if self.bars == 0:
+            raise ValueError("Nenhuma barra aplicada ao estado")
+
+        trades = list(self.trades)
+        cash = self.cash
+        if self.position == "long":
+            cash = self.btc * self.last_close * (1 - self.fee / 100)
+            trades.append({
+                "date": self.last_date,
+                "action": "FINAL SELL",
+                "price": self.last_close,
+                "fgi": self.last_fgi,
+                "cash": cash,
+                "portfolio_value": cash
+            })
+
+        roi_hold = (self.last_close - self.start_price) / self.start_price * 100
+        results = _results_table(trades, cash, self.max_dd, roi_hold, self.hold_max_dd)
+        return results, _trades_frame(trades)
+
+    def to_dict(self):
+        """
+        Representação serializável (JSON) do estado.
+        """
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        data["trades"] = [dict(t, date=t["date"].isoformat()) for t in self.trades]
+        if self.last_date is not None:
+            data["last_date"] = self.last_date.isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data["buy_threshold"], data["sell_threshold"], data["fee"])
+        for field in cls.FIELDS:
+            value = data[field]
+            setattr(state, field, np.float64(value) if field in cls.FLOAT_FIELDS and value is not None else value)
+        state.trades = [
+            {k: pd.Timestamp(v) if k == "date" else (np.float64(v) if isinstance(v, float) else v)
+             for k, v in t.items()}
+            for t in data["trades"]
+        ]
+        if state.last_date is not None:
+            state.last_date = pd.Timestamp(state.last_date)
+        return state
+
+    def save(self, path):
+        """
+        Grava o estado em JSON (escrita atômica: temporário exclusivo + rename, então
+        gravações concorrentes no mesmo path não se misturam).
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                        prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+def _track_drawdown(value, peak, max_dd):
+    """
+    Atualiza (pico, max drawdown) com um novo valor; mesma regra de calculate_max_drawdown.
+    """
+    if peak is None or value > peak:
+        peak = value
+    drawdown = (peak - value) / peak * 100
+    if drawdown > max_dd:
+        max_dd = drawdown
+    return peak, max_dd
+
+def cache_key(df, *params):
+    """
+    Chave de cache para resultados calculados sobre df: versão dos dados, tamanho e
+    datas extremas do df, seguidos de params.
+
+    df.attrs["data_version"] só é usado se os valores do df forem somente leitura
+    (recortes do painel alinhado / datasets do registro): o pandas copia attrs para
+    frames derivados (assign, copy, aritmética, loc), então num df gravável a versão
+    é o hash do conteúdo inteiro (data.data_version sobre todas as linhas).
+    """
+    version = df.attrs.get("data_version")
+    if version is None or not _is_readonly(df):
+        from data import data_version  # import tardio: data traz requests/yfinance
+        version = data_version(df, rows=len(df))
+    bounds = (str(df.index[0]), str(df.index[-1])) if len(df) else (None, None)
+    return (version, len(df), *bounds, *params)
+
+def _is_readonly(df):
+    """
+    True se nenhuma coluna de df pode ser alterada (views de arrays com writeable=False).
+    """
+    return all(not df[c].to_numpy().flags.writeable for c in df.columns)
+
+SWEEP_CACHE_SIZE = 8
+_sweep_cache = OrderedDict()
+
+def _cached_sweep(key, compute):
+    """
+    Resultado de sweep memorizado por cache_key (os SWEEP_CACHE_SIZE mais recentes).
+    Sem chave sempre recalcula. Devolve cópias.
+    """
+    if key is not None and key in _sweep_cache:
+        _sweep_cache.move_to_end(key)
+        return _sweep_cache[key].copy()
+    result = compute()
+    if key is not None:
+        _sweep_cache[key] = result.copy()
+        while len(_sweep_cache) > SWEEP_CACHE_SIZE:
+            _sweep_cache.popitem(last=False)
+    return result
+
+SWEEP_COLUMNS = [
+    "buy_threshold", "sell_threshold", "fee",
+    "Valor Final (USD)", "Retorno (%)", "Max Drawdown (%)", "Num Trades", "Win Rate (%)",
+]
+
+def sweep_thresholds(df, buy_range=range(0, 101), sell_range=range(0, 101), fees=(0.1,)):
+    """
+    Avalia toda a grade (buy_threshold, sell_threshold, fee) numa única passada.
+
+    Os arrays de preço e FGI são extraídos uma vez e compartilhados pela grade inteira.
+    A máquina de estados é resolvida uma vez por par de thresholds (pares que geram
+    os mesmos sinais são calculados uma só vez) e todas as taxas são avaliadas
+    vetorizadas sobre o mesmo encadeamento de trades.
+
+    Retorna DataFrame tidy com uma linha por combinação e as métricas da estratégia
+    (mesmos valores de run_backtest, sem arredondamento). O resultado é memorizado
+    pela versão dos dados (ver cache_key).
+    """
+    close = df["Close"].to_numpy(dtype=float)
+    fgi = df["FGI"].to_numpy(dtype=float)
+    key = cache_key(df, "sweep", tuple(buy_range), tuple(sell_range), tuple(fees))
+    return _cached_sweep(key, lambda: _sweep_arrays(close, fgi, buy_range, sell_range, fees))
+
+def parallel_sweep(df, buy_range=range(0, 101), sell_range=range(0, 101), fees=(0.1,),
+                   windows=None, workers=None, chunk_size=None):
+    """
+    Versão multi-processo de sweep_thresholds sobre thresholds x taxas x janelas de datas.
+
+    Close/FGI são copiados uma única vez para multiprocessing.shared_memory; cada worker
+    mapeia o bloco ao iniciar e recebe apenas (janela, fatia de buy thresholds) por
+    tarefa, nunca o DataFrame. O resultado sai sempre na mesma ordem: janela, buy,
+    sell, fee, com as colunas window_start/window_end à frente de SWEEP_COLUMNS.
+
+    windows: lista de (inicio, fim) inclusivos; None = período inteiro do df.
+    workers: número de processos (padrão: os.cpu_count(); 1 = roda no processo atual).
+    chunk_size: buy thresholds por tarefa (padrão: ~4 tarefas por worker).
+
+    O resultado é memorizado pela versão dos dados (ver cache_key).
+    """
+    buys = list(buy_range)
+    sells = list(sell_range)
+    fees = list(fees)
+    if windows is None:
+        windows = [(df.index[0], df.index[-1])] if len(df) else []
+    key = cache_key(df, "parallel", tuple(buys), tuple(sells), tuple(fees),
+                    tuple((str(pd.to_datetime(a)), str(pd.to_datetime(b))) for a, b in windows))
+    return _cached_sweep(key, lambda: _parallel_sweep(df, buys, sells, fees, windows, workers, chunk_size))
+
+def _parallel_sweep(df, buys, sells, fees, windows, workers, chunk_size):
+    """
+    Execução de parallel_sweep (sem cache).
+    """
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = math.ceil(len(buys) * len(windows) / (workers * 4))
+    chunk_size = max(1, min(chunk_size, len(buys) or 1))
+
+    # Janelas viram fatias [lo, hi) do índice já ordenado
+    tasks = []
+    bounds = []
+    for start, end in windows:
+        start, end = pd.to_datetime(start), pd.to_datetime(end)
+        lo = df.index.searchsorted(start, side="left")
+        hi = df.index.searchsorted(end, side="right")
+        for i in range(0, len(buys), chunk_size):
+            tasks.append((lo, hi, buys[i:i + chunk_size], sells, fees))
+            bounds.append((start, end))
+
+    close = df["Close"].to_numpy(dtype=float)
+    fgi = df["FGI"].to_numpy(dtype=float)
+    n = len(close)
+
+    if workers == 1 or len(tasks) <= 1:
+        frames = [_sweep_arrays(close[lo:hi], fgi[lo:hi], b, s, f) for lo, hi, b, s, f in tasks]
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(1, 2 * n * 8))
+        try:
+            shared = np.ndarray((2, n), dtype=float, buffer=shm.buf)
+            shared[0] = close
+            shared[1] = fgi
+            del shared
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach_shared,
+                                     initargs=(shm.name, n)) as pool:
+                frames = list(pool.map(_sweep_task, tasks))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    columns = ["window_start", "window_end"] + SWEEP_COLUMNS
+    for frame, (start, end) in zip(frames, bounds):
+        frame.insert(0, "window_start", start)
+        frame.insert(1, "window_end", end)
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)[columns]
+
+_SHARED = {}
+
+def _attach_shared(name, n):
+    """
+    Initializer dos workers: mapeia o bloco compartilhado com Close/FGI.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    _SHARED["shm"] = shm
+    _SHARED["arrays"] = np.ndarray((2, n), dtype=float, buffer=shm.buf)
+
+def _sweep_task(task):
+    """
+    Executa uma fatia da grade sobre a janela [lo, hi) dos arrays compartilhados.
+    """
+    lo, hi, buys, sells, fees = task
+    arrays = _SHARED["arrays"]
+    return _sweep_arrays(arrays[0, lo:hi], arrays[1, lo:hi], buys, sells, fees)
+
+def _sweep_arrays(close, fgi, buy_range, sell_range, fees, max_cells=4_000_000):
+    """
+    Núcleo de sweep_thresholds sobre arrays NumPy já alinhados.
+    max_cells limita o tamanho (barras x thresholds de venda x taxas) de cada bloco.
+    """
+    buys = np.asarray(list(buy_range), dtype=float)
+    sells = np.asarray(list(sell_range), dtype=float)
+    fee_values = np.asarray(list(fees), dtype=float)
+    n = len(close)
+
+    if n == 0 or len(buys) == 0 or len(sells) == 0 or len(fee_values) == 0:
+        return pd.DataFrame(columns=SWEEP_COLUMNS)
+
+    # Thresholds que selecionam o mesmo conjunto de valores de FGI geram os mesmos sinais
+    levels = np.unique(fgi[~np.isnan(fgi)])
+    buy_keys, buy_pos = np.unique(np.searchsorted(levels, buys, side="right"), return_inverse=True)
+    sell_keys, sell_pos = np.unique(np.searchsorted(levels, sells, side="left"), return_inverse=True)
+    buy_reps = buys[np.unique(buy_pos, return_index=True)[1]]
+    sell_reps = sells[np.unique(sell_pos, return_index=True)[1]]
+
+    keep = 1 - fee_values / 100
+    shape = (len(buy_keys), len(sell_keys), len(fee_values))
+    final_values = np.empty(shape)
+    max_dd = np.empty(shape)
+    num_trades = np.empty(shape[:2], dtype=np.int64)
+    win_rate = np.empty(shape[:2])
+
+    chunk = max(1, max_cells // (n * len(fee_values)))
+    for bi, b in enumerate(buy_reps):
+        buy = fgi <= b
+        for lo in range(0, len(sell_reps), chunk):
+            cols = slice(lo, lo + chunk)
+            sell = fgi[:, None] >= sell_reps[None, cols]
+            (final_values[bi, cols], max_dd[bi, cols],
+             num_trades[bi, cols], win_rate[bi, cols]) = _evaluate_signals(close, buy, sell, keep)
+
+    bi, si, fi = np.meshgrid(buy_pos, sell_pos, np.arange(len(fee_values)), indexing="ij")
+    final = final_values[bi, si, fi].ravel()
+    return pd.DataFrame({
+        "buy_threshold": np.broadcast_to(buys[:, None, None], bi.shape).ravel(),
+        "sell_threshold": np.broadcast_to(sells[None, :, None], bi.shape).ravel(),
+        "fee": np.broadcast_to(fee_values[None, None, :], bi.shape).ravel(),
+        "Valor Final (USD)": final,
+        "Retorno (%)": (final - INITIAL_CASH) / INITIAL_CASH * 100,
+        "Max Drawdown (%)": max_dd[bi, si, fi].ravel(),
+        "Num Trades": num_trades[bi, si].ravel(),
+        "Win Rate (%)": win_rate[bi, si].ravel(),
+    }, columns=SWEEP_COLUMNS)
+
+def _evaluate_signals(close, buy, sell, keep):
+    """
+    Simula um threshold de compra contra vários thresholds de venda (colunas de sell)
+    e várias taxas (keep = 1 - taxa) sem laço por barra.
+
+    Estado após cada barra: só compra -> long, só venda -> flat, ambos -> inverte
+    (compra se flat, vende se long), nenhum -> mantém. Logo o estado é o da última
+    barra "fixa" combinado com a paridade das barras "ambos" desde então.
+
+    Retorna (valor final [S, m], max drawdown [S, m], num trades [S], win rate [S]).
+    """
+    n, _ = sell.shape
+    bars = np.arange(n)[:, None]
+    buy_col = buy[:, None]
+
+    both = buy_col & sell
+    fixed = buy_col ^ sell
+    last_fixed = np.maximum.accumulate(np.where(fixed, bars, -1), axis=0)
+    has_fixed = last_fixed >= 0
+    base = buy[last_fixed] & has_fixed
+    toggles = np.cumsum(both, axis=0)
+    toggles = toggles - np.where(has_fixed, np.take_along_axis(toggles, np.maximum(last_fixed, 0), axis=0), 0)
+    long_after = base ^ (toggles & 1).astype(bool)
+
+    long_before = np.zeros_like(long_after)
+    long_before[1:] = long_after[:-1]
+    trade = long_after != long_before
+    entries = trade & long_after
+    exits = trade & ~long_after
+    final_sell = long_after[-1]
+
+    # Curva do portfolio antes do trade de cada barra: V[t+1] = V[t] * taxa^trade[t] * retorno^long[t]
+    keep = keep[None, None, :]
+    ratio = (close[1:] / close[:-1])[:, None, None]
+    factors = np.where(trade[:-1, :, None], keep, 1.0) * np.where(long_after[:-1, :, None], ratio, 1.0)
+    values = np.empty((n,) + factors.shape[1:])
+    values[0] = INITIAL_CASH
+    values[1:] = INITIAL_CASH * np.cumprod(factors, axis=0)
+
+    fills_last_bar = trade[-1].astype(int) + final_sell
+    final_values = values[-1] * keep[0] ** fills_last_bar[:, None]
+
+    if n < 2:
+        max_dd = np.zeros(values.shape[1:])
+    else:
+        peak = np.maximum.accumulate(values, axis=0)
+        max_dd = np.maximum(((peak - values) / peak * 100).max(axis=0), 0.0)
+
+    num_trades = trade.sum(axis=0) + final_sell
+
+    # Cada saída (e a venda final) fecha a última entrada
+    entry_price = close[np.maximum.accumulate(np.where(entries, bars, 0), axis=0)]
+    wins = (exits & (close[:, None] > entry_price)).sum(axis=0)
+    wins = wins + (final_sell & (close[-1] > entry_price[-1]))
+    num_entries = entries.sum(axis=0)
+    win_rate = np.where(num_entries > 0, wins / np.maximum(num_entries, 1) * 100, 0.0)
+
+    return final_values, max_dd, num_trades, win_rate
 
 def calculate_max_drawdown(portfolio_values):
     """
     Calcula o máximo drawdown (maior queda do pico ao vale)
     """
-    if not portfolio_values or len(portfolio_values) < 2:
+    values = np.asarray(portfolio_values, dtype=float)
+    if len(values) < 2:
         return 0.0
-    
-    peak = portfolio_values[0]
-    max_dd = 0.0
-    
-    for value in portfolio_values:
-        if value > peak:
-            peak = value
-        drawdown = (peak - value) / peak * 100
-        if drawdown > max_dd:
-            max_dd = drawdown
-    
-    return max_dd
+
+    return float(np.fmax.reduce(_underwater(values), initial=0.0))
+
+def _underwater(values):
+    """
+    Queda (%) de cada ponto em relação ao pico acumulado, ao longo do eixo 0.
+    fmax ignora NaN no pico, como a comparação do loop original.
+    """
+    peak = np.fmax.accumulate(values, axis=0)
+    return (peak - values) / peak * 100
+
+def drawdown_stats(curves):
+    """
+    Estatísticas de drawdown vetorizadas (pico acumulado) de uma ou mais curvas.
+
+    curves: Series ou DataFrame indexado por data (uma coluna por curva);
+    todas as colunas são processadas juntas numa única passada.
+
+    Retorna dict {coluna: stats} (ou stats direto se curves for Series) com:
+        max_drawdown     - maior queda do pico ao vale (%)
+        underwater       - Series com a queda (%) em relação ao pico, por barra
+        peak_date        - data do pico que antecede o max drawdown
+        trough_date      - data do vale do max drawdown
+        recovery_date    - primeira data em que o pico é recuperado (None se não recuperou)
+        longest_duration - maior número de barras consecutivas abaixo do pico
+    """
+    frame = curves.to_frame() if isinstance(curves, pd.Series) else curves
+    values = frame.to_numpy(dtype=float)
+    n = len(values)
+    bars = np.arange(n)[:, None]
+
+    underwater = _underwater(values)
+    max_dd = np.fmax.reduce(underwater, axis=0, initial=0.0)
+    if n < 2:
+        max_dd = np.zeros(values.shape[1])
+    trough = np.argmax(np.nan_to_num(underwater, nan=-np.inf), axis=0) if n else np.zeros(values.shape[1], dtype=int)
+
+    # Posição do último pico e tempo desde ele em cada barra
+    at_peak = underwater <= 0
+    peak_pos = np.maximum.accumulate(np.where(at_peak, bars, 0), axis=0)
+    longest = (bars - peak_pos).max(axis=0) if n else np.zeros(values.shape[1], dtype=int)
+
+    stats = {}
+    for c, column in enumerate(frame.columns):
+        peak_date = trough_date = recovery_date = None
+        if max_dd[c] > 0:
+            t = trough[c]
+            trough_date = frame.index[t]
+            peak_date = frame.index[peak_pos[t, c]]
+            recovered = np.flatnonzero(at_peak[t:, c])
+            if len(recovered):
+                recovery_date = frame.index[t + recovered[0]]
+        stats[column] = {
+            "max_drawdown": float(max_dd[c]),
+            "underwater": pd.Series(underwater[:, c], index=frame.index, name=column),
+            "peak_date": peak_date,
+            "trough_date": trough_date,
+            "recovery_date": recovery_date,
+            "longest_duration": int(longest[c]),
+        }
+
+    if isinstance(curves, pd.Series):
+        return stats[frame.columns[0]]
+    return stats
@@ -0,0 +1,317 @@
+"""
+Benchmarks de desempenho da camada de dados e do backtest.
+
+Uso:
+    python benchmarks.py                      # roda todos
+    python benchmarks.py csv_cache --sizes 10000 1000000
+    python benchmarks.py payload_parsing
+    python benchmarks.py range_query --sizes 1000000
+    python benchmarks.py session_memory --sizes 1 10 50
+    python benchmarks.py export --sizes 10000 100000
+    python benchmarks.py app_rerun
+    python benchmarks.py equity_chart --sizes 100000 1000000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from data import (DatasetRegistry, _append_to_csv, _csv_layout, _parse_binance_klines,
+                  _parse_coingecko_prices, _parse_fgi_payload, _read_csv_cache, _read_price_range,
+                  get_aligned_panel)
+from backtest import run_backtest
+from charts import equity_figure
+from export import csv_zip_bytes, excel_bytes
+
+def _timeit(fn, repeat=3):
+    """
+    Melhor tempo (s) entre `repeat` execuções.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def _synthetic_prices(n, seed=0):
+    """
+    Série sintética de preços com n barras de 1 minuto (cabe no range de datas do pandas).
+    """
+    rng = np.random.default_rng(seed)
+    close = 10_000 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    index = pd.date_range("2010-01-01", periods=n, freq="min", name="date")
+    return pd.DataFrame({"Open": close * (1 + rng.normal(0, 0.0005, n)), "Close": close}, index=index)
+
+def bench_csv_cache(sizes=(10_000, 1_000_000, 10_000_000)):
+    """
+    Leitura do cache local: pd.read_csv com parse_dates vs espelho binário .npz.
+    """
+    print("📦 CSV (parse_dates) vs cache binário .npz")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            csv_path = os.path.join(tmp, f"btc_{n}.csv")
+            _synthetic_prices(n).to_csv(csv_path)
+
+            t_csv = _timeit(lambda: pd.read_csv(csv_path, parse_dates=["date"], index_col="date"))
+            _read_csv_cache(csv_path)  # primeira leitura constrói o .npz
+            t_npz = _timeit(lambda: _read_csv_cache(csv_path))
+
+            print(f"   {n:>12,} linhas | CSV {t_csv * 1000:10.1f} ms | NPZ {t_npz * 1000:8.1f} ms | {t_csv / t_npz:7.1f}x")
+
+def _legacy_parse_fgi(data):
+    """
+    Parser antigo do FGI (um registro por vez), mantido só como referência.
+    """
+    rows = []
+    for d in data:
+        ts = d.get("timestamp")
+        val = d.get("value")
+        if ts is None or val is None:
+            continue
+        try:
+            try:
+                day = pd.to_datetime(int(ts), unit="s").date()
+            except (ValueError, TypeError):
+                day = pd.to_datetime(str(ts), format="%m-%d-%Y").date()
+            rows.append({"date": pd.to_datetime(day), "FGI": float(val)})
+        except Exception:
+            continue
+    return pd.DataFrame(rows).drop_duplicates(subset=["date"]).sort_values("date").set_index("date")
+
+def _legacy_parse_coingecko(prices):
+    rows = []
+    for ts_ms, price in prices:
+        day = pd.to_datetime(ts_ms, unit="ms").date()
+        rows.append({"date": pd.to_datetime(day), "Open": float(price), "Close": float(price)})
+    return pd.DataFrame(rows).drop_duplicates("date").set_index("date")
+
+def _legacy_parse_binance(candles):
+    rows = []
+    for candle in candles:
+        day = pd.to_datetime(candle[0], unit="ms").date()
+        rows.append({"date": pd.to_datetime(day), "Open": float(candle[1]), "Close": float(candle[4])})
+    return pd.DataFrame(rows).drop_duplicates("date").set_index("date")
+
+def bench_payload_parsing(sizes=(100_000,)):
+    """
+    Parse dos payloads JSON (FGI, CoinGecko, Binance): laço por registro vs vetorizado.
+    """
+    print("🧩 Parse de payloads: laço por registro vs vetorizado")
+    day_s = 86_400
+    for n in sizes:
+        seconds = 1_262_304_000 + np.arange(n) * day_s // 24  # várias amostras por dia
+        fgi = [{"timestamp": str(ts), "value": str(ts % 100)} for ts in seconds[::-1]]
+        coingecko = [[int(ts) * 1000, float(ts % 1000)] for ts in seconds]
+        binance = [[int(ts) * 1000, "1.0", "2.0", "0.5", "1.5", "10.0"] for ts in seconds]
+
+        for name, legacy, vectorized, payload in (
+            ("FGI", _legacy_parse_fgi, _parse_fgi_payload, fgi),
+            ("CoinGecko", _legacy_parse_coingecko, _parse_coingecko_prices, coingecko),
+            ("Binance", _legacy_parse_binance, _parse_binance_klines, binance),
+        ):
+            t_loop = _timeit(lambda: legacy(payload), repeat=1)
+            t_vec = _timeit(lambda: vectorized(payload))
+            print(f"   {name:<10} {n:>10,} registros | laço {t_loop * 1000:9.1f} ms | vetorizado {t_vec * 1000:7.1f} ms | {t_loop / t_vec:6.1f}x")
+
+def bench_range_query(sizes=(1_000_000, 10_000_000)):
+    """
+    Consulta de um trimestre: CSV inteiro + máscara vs cache particionado por ano,
+    e o append incremental (só a partição mais recente é regravada).
+    """
+    print("🗂️ Trimestre: CSV inteiro + máscara vs partições")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            csv_path = os.path.join(tmp, f"btc_{n}.csv")
+            df = _synthetic_prices(n)
+            df.to_csv(csv_path)
+            start = df.index[n // 2].normalize()
+            end = start + pd.DateOffset(months=3)
+
+            def full_scan():
+                full = pd.read_csv(csv_path, parse_dates=["date"], index_col="date")
+                return full.loc[(full.index >= start) & (full.index <= end)]
+
+            t_csv = _timeit(full_scan, repeat=1)
+            _read_price_range(csv_path, start, end)  # primeira leitura constrói as partições
+            t_parts = _timeit(lambda: _read_price_range(csv_path, start, end))
+
+            new = _synthetic_prices(1440, seed=1)
+            new.index = new.index + (df.index[-1] - new.index[0]) + pd.Timedelta(minutes=1)
+            t0 = time.perf_counter()
+            _append_to_csv(csv_path, new, _csv_layout(csv_path))
+            t_append = time.perf_counter() - t0
+
+            print(f"   {n:>12,} linhas | CSV {t_csv * 1000:10.1f} ms | partições {t_parts * 1000:8.1f} ms | "
+                  f"{t_csv / t_parts:7.1f}x | append 1 dia {t_append * 1000:8.1f} ms")
+
+def bench_session_memory(sizes=(1, 10, 50), rows=1_000_000):
+    """
+    Memória retida por N sessões do app, cada uma com seu recorte de BTC e a série
+    alinhada: cópias por sessão (máscara + join) vs registro compartilhado (views).
+    """
+    print(f"🧠 Memória por sessão ({rows:,} barras): cópias vs registro compartilhado")
+    btc = _synthetic_prices(rows)
+    fgi = pd.DataFrame({"FGI": np.arange(rows) % 100}, index=btc.index, dtype="float64")
+    start, end = btc.index[rows // 10], btc.index[-rows // 10]
+
+    def copies():
+        px = btc.loc[(btc.index >= start) & (btc.index <= end)]
+        df = px.join(fgi, how="inner")
+        return px, df.loc[(df.index >= start) & (df.index <= end)]
+
+    registry = DatasetRegistry()
+
+    def publish():
+        # Uma vez por processo: datasets congelados + painel alinhado
+        registry.publish("btc", btc)
+        registry.publish("fgi", fgi)
+        get_aligned_panel(registry.get("fgi"), registry.get("btc"), path=None)
+
+    def shared():
+        px = registry.get("btc")
+        lo, hi = px.index.searchsorted(start), px.index.searchsorted(end, side="right")
+        return px.iloc[lo:hi], get_aligned_panel(registry.get("fgi"), px, path=None).slice(start, end)
+
+    for label, session, setup in (
+        ("cópias", copies, lambda: None),
+        ("registro", shared, publish),
+    ):
+        for n in sizes:
+            tracemalloc.start()
+            setup()
+            base = tracemalloc.get_traced_memory()[0]
+            held = [session() for _ in range(n)]
+            used = tracemalloc.get_traced_memory()[0] - base
+            tracemalloc.stop()
+            print(f"   {label:<9} {n:>4} sessões | {used / 2**20:9.1f} MB | {used / n / 2**10:10.1f} KB/sessão")
+            del held
+
+def bench_export(sizes=(10_000, 100_000)):
+    """
+    Exportação dos resultados (aba Dados com n linhas): Excel padrão do pandas vs
+    Excel write-only (streaming) vs CSV zip, tudo em memória.
+    """
+    print("📥 Exportação: Excel (pandas) vs Excel write-only vs CSV zip")
+    results = pd.DataFrame({"Estrategia": ["FGI Strategy", "Buy & Hold"], "Retorno (%)": [10.0, 5.0]})
+    trades = pd.DataFrame({"date": ["2020-01-01"] * 100, "action": ["BUY", "SELL"] * 50, "price": 1.0})
+    for n in sizes:
+        df = _synthetic_prices(n).assign(FGI=50.0)
+        t_pandas = _timeit(lambda: excel_bytes(results, trades, df, write_only=False), repeat=1)
+        t_stream = _timeit(lambda: excel_bytes(results, trades, df, write_only=True), repeat=1)
+        t_zip = _timeit(lambda: csv_zip_bytes(results, trades, df), repeat=1)
+        print(f"   {n:>10,} linhas | pandas {t_pandas * 1000:9.1f} ms | write-only {t_stream * 1000:9.1f} ms | "
+              f"CSV zip {t_zip * 1000:8.1f} ms")
+
+def bench_app_rerun(sizes=(20,)):
+    """
+    Custo de mexer num slider do app.py com o AppTest do Streamlit: rerun do script
+    inteiro vs rerun só do fragmento de parâmetros/resultados (tempo mediano e
+    número de deltas enviados ao navegador), sobre CSVs sintéticos locais.
+
+    O AppTest do Streamlit 1.36 sempre reroda o script inteiro; o rerun de fragmento
+    é simulado mantendo o FragmentStorage entre execuções e pedindo só o fragmento
+    (fragment_id_queue), como o servidor faz.
+    """
+    from streamlit.runtime.fragment import MemoryFragmentStorage
+    from streamlit.runtime.scriptrunner import RerunData
+    from streamlit.testing.v1 import AppTest
+    from streamlit.testing.v1 import local_script_runner
+
+    storage = MemoryFragmentStorage()
+    fragment_ids = []
+    deltas = []
+    run = local_script_runner.LocalScriptRunner.run
+
+    def counting_run(self, *args, **kwargs):
+        tree = run(self, *args, **kwargs)
+        deltas.append(sum(1 for msg in self.forward_msgs() if msg.HasField("delta")))
+        return tree
+
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    cwd = os.getcwd()
+    print("🖱️ Rerun do app ao mexer num slider: script inteiro vs fragmento")
+    with tempfile.TemporaryDirectory() as tmp:
+        index = pd.date_range("2018-02-01", pd.Timestamp.today().normalize(), freq="D", name="date")
+        close = _synthetic_prices(len(index))["Close"].to_numpy()
+        pd.DataFrame({"Open": close, "Close": close}, index=index).to_csv(os.path.join(tmp, "btc_prices.csv"))
+        pd.DataFrame({"FGI": np.arange(len(index)) % 100}, index=index).to_csv(os.path.join(tmp, "fear_greed.csv"))
+
+        patches = [
+            (local_script_runner, "MemoryFragmentStorage", lambda: storage),
+            (local_script_runner, "RerunData", lambda **kw: RerunData(fragment_id_queue=list(fragment_ids), **kw)),
+            (local_script_runner.LocalScriptRunner, "run", counting_run),
+        ]
+        saved = [(obj, attr, getattr(obj, attr)) for obj, attr, _ in patches]
+        try:
+            os.chdir(tmp)
+            for obj, attr, value in patches:
+                setattr(obj, attr, value)
+
+            at = AppTest.from_file(app_path, default_timeout=120)
+            at.run()
+            at.button[0].click().run()
+            for label, ids in (("script inteiro", []), ("fragmento", list(storage._fragments)[:1])):
+                fragment_ids[:] = ids
+                times = []
+                for i in range(sizes[0]):
+                    t0 = time.perf_counter()
+                    at.slider[0].set_value(20 + i % 5).run()
+                    times.append(time.perf_counter() - t0)
+                print(f"   {label:<15} | mediana {statistics.median(times) * 1000:7.1f} ms | {deltas[-1]:4d} deltas")
+        finally:
+            os.chdir(cwd)
+            for obj, attr, value in saved:
+                setattr(obj, attr, value)
+
+def bench_equity_chart(sizes=(100_000, 1_000_000)):
+    """
+    Gráfico de capital/drawdown: Scatter com a série inteira vs LTTB + Scattergl
+    (tempo para montar e serializar a figura e tamanho do JSON enviado ao navegador).
+    """
+    print("📉 Curvas de capital: série inteira vs LTTB + Scattergl (1200 px)")
+    for n in sizes:
+        df = _synthetic_prices(n)
+        df["FGI"] = np.clip(50 + np.cumsum(np.random.default_rng(1).normal(0, 1, n)) * 0.1, 0, 100)
+        _, trades, details = run_backtest(df, details=True)
+        curves = details["curves"]
+
+        t0 = time.perf_counter()
+        raw = go.Figure([go.Scatter(x=curves.index, y=curves[c], name=c) for c in curves.columns]).to_json()
+        t_raw = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        small = equity_figure(curves, details["drawdown"], trades).to_json()
+        t_lttb = time.perf_counter() - t0
+
+        print(f"   {n:>10,} pontos | inteira {t_raw * 1000:9.1f} ms {len(raw) / 2**20:7.1f} MB | "
+              f"LTTB {t_lttb * 1000:7.1f} ms {len(small) / 2**20:6.2f} MB")
+
+BENCHMARKS = {
+    "csv_cache": bench_csv_cache,
+    "payload_parsing": bench_payload_parsing,
+    "range_query": bench_range_query,
+    "session_memory": bench_session_memory,
+    "export": bench_export,
+    "app_rerun": bench_app_rerun,
+    "equity_chart": bench_equity_chart,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks do FGI Backtest")
+    parser.add_argument("names", nargs="*", help=f"benchmarks a rodar: {', '.join(BENCHMARKS)} (padrão: todos)")
+    parser.add_argument("--sizes", nargs="+", type=int, help="tamanhos (linhas) a testar")
+    args = parser.parse_args()
+
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"benchmark desconhecido: {', '.join(sorted(unknown))}")
+
+    for name in args.names or BENCHMARKS:
+        kwargs = {"sizes": args.sizes} if args.sizes else {}
+        BENCHMARKS[name](**kwargs)
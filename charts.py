@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+CHART_WIDTH_PX = 1200  # largura padrão do gráfico: ~1 ponto por pixel após o LTTB
+COLORS = {"FGI Strategy": "#00cc96", "Buy & Hold": "#636efa"}
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: índices de n_out pontos que preservam a forma
+    da série (picos e vales incluídos). Primeiro e último pontos são mantidos; os
+    demais são divididos em n_out - 2 baldes e de cada balde fica o ponto que forma
+    o maior triângulo com o ponto escolhido antes e a média do balde seguinte.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    edges = np.append(edges, n)
+    # Média de cada balde (inclusive o último "balde", que é só o ponto final)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x, edges[:-1]) / counts
+    avg_y = np.add.reduceat(y, edges[:-1]) / counts
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        xa, ya = x[a], y[a]
+        # Dobro da área do triângulo (a, ponto do balde, média do próximo balde)
+        dx, dy = xa - avg_x[b + 1], avg_y[b + 1] - ya
+        area = np.abs(dx * y[lo:hi] + dy * x[lo:hi] - (dx * ya + dy * xa))
+        a = lo + int(area.argmax())
+        indices[b + 1] = a
+    return indices
+
+def downsample(series: pd.Series, n_out: int) -> pd.Series:
+    """
+    Série reduzida a no máximo n_out pontos com LTTB (NaN são descartados antes).
+    """
+    series = series.dropna()
+    x = series.index.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    return series.iloc[lttb_indices(x, series.to_numpy(dtype=float), n_out)]
+
+def _trade_markers(trades: pd.DataFrame, max_markers: int):
+    """
+    Trades como pontos (data, valor do portfolio), por tipo de ordem; acima de
+    max_markers por tipo, uma amostra uniforme.
+    """
+    if trades.empty or "date" not in trades.columns:
+        return []
+    dates = pd.to_datetime(trades["date"])
+    markers = []
+    for label, actions, symbol, color in (
+        ("Compra", ("BUY",), "triangle-up", "#2ca02c"),
+        ("Venda", ("SELL", "FINAL SELL"), "triangle-down", "#d62728"),
+    ):
+        mask = trades["action"].isin(actions).to_numpy()
+        if not mask.any():
+            continue
+        pos = np.flatnonzero(mask)
+        if len(pos) > max_markers:
+            pos = pos[np.linspace(0, len(pos) - 1, max_markers).astype(np.int64)]
+        markers.append((label, dates.iloc[pos], trades["portfolio_value"].iloc[pos], symbol, color))
+    return markers
+
+def equity_figure(curves: pd.DataFrame, drawdown: dict, trades: pd.DataFrame,
+                  width_px: int = CHART_WIDTH_PX) -> go.Figure:
+    """
+    Curvas de capital (estratégia x Buy & Hold) e de drawdown com marcadores de trade.
+
+    Cada curva passa por LTTB até width_px pontos e é desenhada com Scattergl
+    (WebGL), então o payload enviado ao navegador é limitado pela largura em
+    pixels e não pelo tamanho da série.
+
+    curves/drawdown: saída de run_backtest(..., details=True)["curves"/"drawdown"].
+    """
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.04,
+                        row_heights=[0.68, 0.32], subplot_titles=("Capital (USD)", "Drawdown (%)"))
+
+    traces, rows = [], []
+    for name in curves.columns:
+        color = COLORS.get(name)
+        equity = downsample(curves[name], width_px)
+        traces.append(go.Scattergl(x=equity.index, y=equity.to_numpy(), name=name, mode="lines",
+                                   legendgroup=name, line=dict(color=color, width=1.5)))
+        rows.append(1)
+        underwater = downsample(-drawdown[name]["underwater"], width_px)
+        traces.append(go.Scattergl(x=underwater.index, y=underwater.to_numpy(), name=name, mode="lines",
+                                   legendgroup=name, showlegend=False, fill="tozeroy",
+                                   line=dict(color=color, width=1)))
+        rows.append(2)
+
+    for label, dates, values, symbol, color in _trade_markers(trades, width_px):
+        traces.append(go.Scattergl(x=dates, y=values, name=label, mode="markers",
+                                   marker=dict(symbol=symbol, size=9, color=color)))
+        rows.append(1)
+
+    fig.add_traces(traces, rows=rows, cols=[1] * len(traces))
+    fig.update_layout(height=560, template="plotly_white", hovermode="x unified",
+                      legend=dict(orientation="h", y=1.08), margin=dict(t=60, b=20))
+    return fig
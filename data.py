@@ -1,9 +1,316 @@
+import numpy as np
 import pandas as pd
 import requests
 import yfinance as yf
+from requests.adapters import HTTPAdapter
 from datetime import date, datetime, timedelta
+import hashlib
+import io
 import os
+import shutil
+import json
+import tempfile
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+HTTP_TIMEOUT = (5, 30)  # (conexão, leitura) em segundos, para todas as fontes
+HTTP_POOL_SIZES = {
+    "https://api.binance.com": 8,
+    "https://raw.githubusercontent.com": 2,
+    "https://api.coingecko.com": 2,
+    "https://api.alternative.me": 2,
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+def _http_session() -> requests.Session:
+    """
+    Sessão HTTP única da camada de dados: conexões keep-alive reaproveitadas,
+    pool por host (HTTP_POOL_SIZES) e respostas gzip.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update({"User-Agent": "FGI-Backtest/1.0", "Accept-Encoding": "gzip, deflate"})
+            session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=4))
+            for prefix, size in HTTP_POOL_SIZES.items():
+                session.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=size))
+            _session = session
+    return _session
+
+def _http_get(url: str, **kwargs) -> requests.Response:
+    """
+    GET pela sessão compartilhada com o timeout padrão (HTTP_TIMEOUT).
+    """
+    kwargs.setdefault("timeout", HTTP_TIMEOUT)
+    return _http_session().get(url, **kwargs)
+
+@contextmanager
+def _file_lock(path: str):
+    """
+    Lock exclusivo entre processos (e threads) em '<path>.lock'; bloqueia até obter.
+    Garante um único preenchimento/atualização do cache por vez (single-flight).
+    """
+    with open(f"{path}.lock", "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+@contextmanager
+def _atomic_write(path: str, mode: str = "wb"):
+    """
+    Escreve num temporário exclusivo do mesmo diretório e faz os.replace ao final:
+    leitores nunca veem um arquivo truncado e escritores concorrentes não se misturam.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                    prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+            yield f
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def _csv_signature(csv_path: str):
+    """
+    (mtime, tamanho) do arquivo, ou None se não existir.
+    """
+    try:
+        stat = os.stat(csv_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+class SourceUnavailable(RuntimeError):
+    """
+    Fonte pulada porque o circuito dela está aberto.
+    """
+
+class CircuitBreaker:
+    """
+    Disjuntor por fonte de dados com memória de saúde (falhas recentes e latência).
+
+    closed: a fonte é usada normalmente. Após failure_threshold falhas seguidas o
+    circuito abre (open) e a fonte é pulada por reset_timeout segundos. Passado esse
+    tempo ele fica half-open: uma única chamada de teste é liberada; sucesso fecha o
+    circuito, falha reabre (com espera dobrada, até max_timeout).
+    A latência é uma média móvel exponencial (peso alpha) das chamadas medidas.
+    """
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 300.0,
+                 max_timeout: float = 3600.0, alpha: float = 0.3):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_timeout = max_timeout
+        self.alpha = alpha
+        self.failures = 0
+        self.successes = 0
+        self.total_failures = 0
+        self.latency = None
+        self.last_error = None
+        self._timeout = reset_timeout
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self._timeout:
+            return "half-open"
+        return "open"
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def allow(self) -> bool:
+        """
+        True se a fonte pode ser chamada agora (em half-open, só a primeira chamada passa).
+        """
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def _observe(self, elapsed):
+        if elapsed is not None:
+            self.latency = elapsed if self.latency is None else self.alpha * elapsed + (1 - self.alpha) * self.latency
+
+    def record_success(self, elapsed: float = None):
+        with self._lock:
+            self._observe(elapsed)
+            if self._opened_at is not None:
+                print(f"🟢 {self.name}: circuito fechado")
+            self.successes += 1
+            self.failures = 0
+            self._opened_at = None
+            self._probing = False
+            self._timeout = self.reset_timeout
+
+    def record_failure(self, elapsed: float = None, error=None):
+        with self._lock:
+            self._observe(elapsed)
+            self.failures += 1
+            self.total_failures += 1
+            self.last_error = str(error)[:200] if error is not None else None
+            if self._probing:
+                self._timeout = min(self._timeout * 2, self.max_timeout)
+            if self._probing or (self._opened_at is None and self.failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                print(f"🔴 {self.name}: circuito aberto por {self._timeout:.0f}s ({self.failures} falhas seguidas)")
+            self._probing = False
+
+    def rank(self):
+        """
+        Chave de ordenação do fallback: fechados antes de half-open, sem falhas recentes
+        antes de instáveis, e entre esses a menor latência medida (sem medida = 0, para
+        que fontes novas sejam experimentadas).
+        """
+        with self._lock:
+            state = self._state()
+            return ({"closed": 0, "half-open": 1}.get(state, 2), self.failures, self.latency or 0.0)
+
+    def status(self) -> dict:
+        with self._lock:
+            state = self._state()
+            retry_in = None
+            if self._opened_at is not None:
+                retry_in = max(0.0, self._timeout - (time.monotonic() - self._opened_at))
+            return {
+                "source": self.name,
+                "state": state,
+                "failures": self.failures,
+                "successes": self.successes,
+                "total_failures": self.total_failures,
+                "latency": self.latency,
+                "retry_in": retry_in,
+                "last_error": self.last_error,
+            }
+
+SOURCE_HEALTH = {name: CircuitBreaker(name) for name in
+                 ("GitHub", "Yahoo Finance", "CoinGecko", "Binance", "alternative.me")}
+
+def _rank_sources(sources):
+    """
+    Reordena [(nome, fetch), ...] pela saúde medida (ordem original como desempate)
+    e remove as fontes com circuito aberto.
+    """
+    ranked = []
+    for position, (name, fetch) in enumerate(sources):
+        key = SOURCE_HEALTH[name].rank()
+        if key[0] == 2:
+            print(f"⏭️ {name}: circuito aberto, pulando")
+            continue
+        ranked.append((key, position, name, fetch))
+    ranked.sort(key=lambda item: item[:2])
+    return [(name, fetch) for _, _, name, fetch in ranked]
+
+def source_health() -> list:
+    """
+    Estado do disjuntor de cada fonte (para logs / painel de diagnóstico).
+    """
+    return [breaker.status() for breaker in SOURCE_HEALTH.values()]
+
+FGI_CSV_URL = "https://raw.githubusercontent.com/Gabrielrr2025/csvexportFGI/refs/heads/main/fear_greed.csv"
+BTC_CSV_URL = "https://raw.githubusercontent.com/Gabrielrr2025/exportbtc/refs/heads/main/btc_prices.csv"
+FGI_COLUMNS = ("FGI",)
+PRICE_COLUMNS = ("Open", "Close")
+
+def _download_csv(url: str, csv_path: str, required, conditional: bool = True):
+    """
+    Baixa um CSV remoto (GitHub raw) e grava o corpo como cache local em csv_path.
+
+    O corpo só é gravado depois de parseado (coluna 'date' como índice) e de ter as
+    colunas `required`; um corpo inválido (ex.: página HTML de erro) levanta
+    ValueError e a cópia local fica intacta.
+
+    ETag e Last-Modified da resposta ficam em '<csv>.http.json'. Com conditional=True
+    e cópia local presente, o GET envia If-None-Match / If-Modified-Since: um 304
+    mantém a cópia local sem transferir o corpo e retorna None. Caso contrário
+    retorna o DataFrame baixado. Erros HTTP/rede são propagados, e com o circuito
+    do GitHub aberto levanta SourceUnavailable sem tocar a rede.
+    """
+    meta_path = f"{csv_path}.http.json"
+    headers = {}
+    if conditional and os.path.exists(csv_path):
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                validators = json.load(f)
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+        except (OSError, ValueError):
+            pass
+
+    breaker = SOURCE_HEALTH["GitHub"]
+    if not breaker.allow():
+        raise SourceUnavailable("GitHub: circuito aberto")
+    t0 = time.perf_counter()
+    try:
+        r = _http_get(url, headers=headers)
+        if r.status_code != 304:
+            r.raise_for_status()
+            df = pd.read_csv(io.BytesIO(r.content), parse_dates=["date"], index_col="date")
+            missing = [c for c in required if c not in df.columns]
+            if missing or df.empty:
+                raise ValueError(f"CSV inválido em {url} (faltando: {', '.join(missing) or 'linhas'})")
+    except Exception as e:
+        breaker.record_failure(time.perf_counter() - t0, e)
+        raise
+    breaker.record_success(time.perf_counter() - t0)
+    if r.status_code == 304:
+        print(f"✅ {csv_path} já está atualizado (304 Not Modified)")
+        return None
+
+    # Salva localmente para uso futuro (escrita atômica)
+    try:
+        with _atomic_write(csv_path) as f:
+            f.write(r.content)
+        with _atomic_write(meta_path, "w") as f:
+            json.dump({"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}, f)
+        print(f"💾 CSV salvo localmente em {csv_path}")
+    except OSError as e:
+        print(f"⚠️ Não foi possível salvar {csv_path}: {e}")
+
+    return df
 
 def _empty_fgi_df():
     return pd.DataFrame({"FGI": pd.Series(dtype="float")}).set_index(
@@ -15,19 +322,262 @@ def _empty_btc_df():
         pd.DatetimeIndex([], name="date")
     )
 
-def get_fgi_history(csv_path: str = "fear_greed.csv") -> pd.DataFrame:
+def _read_csv_cache(csv_path: str) -> pd.DataFrame:
+    """
+    Lê um CSV de cache (coluna 'date' + colunas numéricas) usando um espelho binário
+    '<csv>.npz' ao lado do arquivo, evitando o parse de datas a cada chamada.
+
+    O .npz guarda o índice como datetime64 (int64), cada coluna no dtype lido do CSV
+    e a assinatura (mtime, tamanho) do CSV; se o CSV mudar, o .npz é recriado.
+    """
+    npz_path = f"{csv_path}.npz"
+    stat = os.stat(csv_path)
+    signature = np.array([stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+
+    if os.path.exists(npz_path):
+        try:
+            with np.load(npz_path, allow_pickle=False) as npz:
+                if np.array_equal(npz["_signature"], signature):
+                    index = pd.DatetimeIndex(npz["_date"], name="date")
+                    return pd.DataFrame({c: npz[c] for c in npz["_columns"]}, index=index)
+        except Exception as e:
+            print(f"⚠️ Cache binário inválido, recriando: {e}")
+
+    df = pd.read_csv(csv_path, parse_dates=["date"], index_col="date")
+    if not isinstance(df.index, pd.DatetimeIndex) and len(df):
+        # Datas só com dia e com horário no mesmo arquivo (cache diário que recebeu barras intradiárias)
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.index, format="ISO8601"), name="date")
+
+    # Só colunas numéricas com índice de datas vão para o binário
+    if isinstance(df.index, pd.DatetimeIndex) and all(pd.api.types.is_numeric_dtype(t) for t in df.dtypes):
+        try:
+            with _atomic_write(npz_path) as f:
+                np.savez(
+                    f,
+                    _signature=signature,
+                    _date=df.index.to_numpy(dtype="datetime64[ns]"),
+                    _columns=np.array(df.columns, dtype=str),
+                    **{c: df[c].to_numpy() for c in df.columns},
+                )
+        except Exception as e:
+            print(f"⚠️ Não foi possível gravar cache binário: {e}")
+
+    return df
+
+PARTITION_FREQ = "Y"  # "Y" = uma partição por ano, "M" = por mês
+PARTITION_LAYOUT = "block"  # bloco (n, colunas) float64 + datas separadas por partição
+CSV_CHUNK_ROWS = 500_000  # linhas lidas por vez ao (re)construir as partições a partir do CSV
+
+def _read_price_range(csv_path: str, start, end, columns=PRICE_COLUMNS) -> pd.DataFrame:
+    """
+    Recorte [start, end] das colunas de preço do cache local sem carregar o arquivo todo.
+
+    O cache é particionado por período (PARTITION_FREQ) em '<csv>.parts/': cada
+    partição guarda um bloco contíguo (n, colunas) de float64 em '<chave>.records.npy'
+    e as datas em '<chave>.index.npy'; o 'manifest.json' guarda o intervalo de datas
+    de cada uma. Só as partições que cruzam a janela são abertas (memory-mapped) e o
+    recorte dentro delas é feito com busca binária nas datas. Se a janela cai numa
+    única partição, o DataFrame retornado é uma view somente leitura sobre o mmap;
+    se cruza partições, as fatias são concatenadas (cópia, também somente leitura).
+    """
+    store = _open_partitions(csv_path)
+    if store is None or any(c not in store[0]["columns"] for c in columns):
+        df = _read_csv_cache(csv_path)
+        return df.loc[(df.index >= pd.to_datetime(start)) & (df.index <= pd.to_datetime(end)), list(columns)]
+
+    manifest, parts_dir = store
+    positions = [manifest["columns"].index(c) for c in columns]
+    lo_ts = np.datetime64(pd.to_datetime(start), "ns")
+    hi_ts = np.datetime64(pd.to_datetime(end), "ns")
+
+    dates, blocks = [], []
+    for part in manifest["partitions"]:
+        if np.datetime64(part["end"], "ns") < lo_ts or np.datetime64(part["start"], "ns") > hi_ts:
+            continue
+        index = np.load(os.path.join(parts_dir, part["index"]), mmap_mode="r")
+        lo = index.searchsorted(lo_ts, side="left")
+        hi = index.searchsorted(hi_ts, side="right")
+        if hi > lo:
+            records = np.load(os.path.join(parts_dir, part["records"]), mmap_mode="r")
+            dates.append(index[lo:hi])
+            blocks.append(_select_columns(records[lo:hi], positions))
+
+    if not blocks:
+        return pd.DataFrame(columns=list(columns), dtype="float64",
+                            index=pd.DatetimeIndex([], name="date"))
+    if len(blocks) > 1:
+        dates = [_readonly(np.concatenate(dates))]
+        blocks = [_readonly(np.concatenate(blocks))]
+    return pd.DataFrame(blocks[0], index=pd.DatetimeIndex(dates[0], name="date"),
+                        columns=list(columns), copy=False)
+
+def _select_columns(block: np.ndarray, positions: list) -> np.ndarray:
+    """
+    Colunas `positions` de um bloco (n, k): view se forem consecutivas e em ordem,
+    senão cópia (também somente leitura).
+    """
+    first = positions[0]
+    if positions == list(range(first, first + len(positions))):
+        return block[:, first:first + len(positions)]
+    return _readonly(block[:, positions])
+
+def _partition_block(df: pd.DataFrame, columns):
+    """
+    DataFrame -> (datas datetime64[ns], bloco contíguo (n, colunas) de float64).
+    """
+    return (df.index.to_numpy(dtype="datetime64[ns]"),
+            np.ascontiguousarray(df[list(columns)].to_numpy(dtype=np.float64)))
+
+def _write_partitions(parts_dir: str, df: pd.DataFrame, columns, partitions: dict) -> dict:
+    """
+    Grava (atomicamente) uma partição por período presente em df e atualiza
+    `partitions` {chave: entrada do manifest}. Linhas já existentes na partição são
+    mantidas; datas repetidas ficam com o valor novo.
+    """
+    keys = df.index.to_period(PARTITION_FREQ).astype(str)
+    for key, chunk in df.groupby(keys, sort=True):
+        _write_partition(parts_dir, key, *_partition_block(chunk, columns), partitions)
+    return partitions
+
+def _write_partition(parts_dir: str, key: str, dates: np.ndarray, block: np.ndarray, partitions: dict):
+    """
+    Grava datas e bloco de uma partição, mesclando com os arquivos já registrados em
+    `partitions` (se houver), e atualiza a entrada do manifest.
+    """
+    entry = {"key": key, "records": f"{key}.records.npy", "index": f"{key}.index.npy"}
+    records_path = os.path.join(parts_dir, entry["records"])
+    index_path = os.path.join(parts_dir, entry["index"])
+    if key in partitions and os.path.exists(records_path) and os.path.exists(index_path):
+        old_dates = np.load(index_path)
+        keep = ~np.isin(old_dates, dates)
+        dates = np.concatenate([old_dates[keep], dates])
+        block = np.concatenate([np.load(records_path)[keep], block])
+    if len(dates) > 1 and (np.diff(dates) < np.timedelta64(0, "ns")).any():
+        order = np.argsort(dates, kind="stable")
+        dates, block = dates[order], block[order]
+
+    # Bloco primeiro, datas depois; o manifest (gravado por último) valida os dois
+    with _atomic_write(records_path) as f:
+        np.save(f, np.ascontiguousarray(block))
+    with _atomic_write(index_path) as f:
+        np.save(f, dates)
+    partitions[key] = dict(entry, start=str(dates[0]), end=str(dates[-1]), rows=int(len(dates)))
+
+def _save_manifest(parts_dir: str, signature, columns, partitions: dict):
+    manifest = {
+        "signature": list(signature),
+        "freq": PARTITION_FREQ,
+        "layout": PARTITION_LAYOUT,
+        "columns": list(columns),
+        "partitions": [partitions[k] for k in sorted(partitions)],
+    }
+    with _atomic_write(os.path.join(parts_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+    return manifest
+
+def _load_manifest(parts_dir: str):
+    try:
+        with open(os.path.join(parts_dir, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("freq") != PARTITION_FREQ or manifest.get("layout") != PARTITION_LAYOUT:
+        return None
+    return manifest
+
+def _open_partitions(csv_path: str):
+    """
+    (manifest, diretório) das partições do CSV, reconstruindo tudo se o CSV mudou
+    por fora (ex.: novo download do GitHub), sem carregar o CSV inteiro na memória.
+    Retorna None se o CSV estiver vazio ou sem colunas numéricas.
+    """
+    parts_dir = f"{csv_path}.parts"
+    signature = list(_csv_signature(csv_path))
+    manifest = _load_manifest(parts_dir)
+    if manifest is not None and manifest["signature"] == signature:
+        return manifest, parts_dir
+
+    # CSV lido em blocos de CSV_CHUNK_ROWS linhas, cada bloco gravado nas suas
+    # partições: a memória fica limitada a um bloco + uma partição, não ao arquivo.
+    # Como o CSV normalmente está em ordem, só a partição do fim do bloco fica
+    # pendente (pode continuar no próximo); fora de ordem, a partição é mesclada.
+    os.makedirs(parts_dir, exist_ok=True)
+    partitions, pending, columns, rows = {}, {}, None, 0
+    for chunk in pd.read_csv(csv_path, index_col="date", chunksize=CSV_CHUNK_ROWS):
+        if columns is None:
+            columns = [c for c in chunk.columns if pd.api.types.is_numeric_dtype(chunk[c])]
+            if not columns:
+                return None
+        chunk.index = pd.DatetimeIndex(pd.to_datetime(chunk.index, format="ISO8601"), name="date")
+        keys = chunk.index.to_period(PARTITION_FREQ).astype(str)
+        for key, part in chunk.groupby(keys, sort=False):
+            pending.setdefault(key, []).append(_partition_block(part, columns))
+        for key in [k for k in pending if k != keys[-1]]:
+            _flush_partition(parts_dir, key, pending.pop(key), partitions)
+        rows += len(chunk)
+    for key in list(pending):
+        _flush_partition(parts_dir, key, pending.pop(key), partitions)
+    if not partitions:
+        return None
+
+    # O manifest (que valida o store) por último
+    manifest = _save_manifest(parts_dir, signature, columns, partitions)
+    current = {part[f] for part in partitions.values() for f in ("records", "index")}
+    for name in os.listdir(parts_dir):
+        if name.endswith(".npy") and name not in current:
+            os.remove(os.path.join(parts_dir, name))
+    print(f"💾 Cache particionado criado para {csv_path} ({rows} registros, {len(partitions)} partições)")
+    return manifest, parts_dir
+
+def _flush_partition(parts_dir: str, key: str, pieces: list, partitions: dict):
+    dates, blocks = zip(*pieces)
+    _write_partition(parts_dir, key, np.concatenate(dates), np.concatenate(blocks), partitions)
+
+def _update_partitions(csv_path: str, new: pd.DataFrame, old_signature):
+    """
+    Após um append no CSV, regrava só as partições que receberam linhas novas
+    (normalmente a mais recente) e atualiza o manifest. Colunas do store que as
+    linhas novas não trazem (ex.: Volume num append só com Open/Close) ficam NaN,
+    como no CSV. Se o store já estava desatualizado, não faz nada: a próxima
+    leitura reconstrói tudo.
+    """
+    parts_dir = f"{csv_path}.parts"
+    manifest = _load_manifest(parts_dir)
+    if manifest is None or old_signature is None or manifest["signature"] != list(old_signature):
+        return
+
+    new = new.reindex(columns=manifest["columns"])
+    new.index = pd.to_datetime(new.index)
+    partitions = {p["key"]: p for p in manifest["partitions"]}
+    touched = set(new.index.to_period(PARTITION_FREQ).astype(str))
+    _write_partitions(parts_dir, new.sort_index(), manifest["columns"], partitions)
+    _save_manifest(parts_dir, _csv_signature(csv_path), manifest["columns"], partitions)
+    print(f"💾 Partições atualizadas: {', '.join(sorted(touched))}")
+
+def get_fgi_history(csv_path: str = "fear_greed.csv", revalidate: bool = False) -> pd.DataFrame:
     """
     Carrega o Fear & Greed Index com fallback em 3 níveis:
     1. CSV local (se existir)
     2. GitHub raw URL
     3. API alternative.me (último recurso)
     
+    revalidate=True confere antes o CSV local com o GitHub via GET condicional
+    (ETag / If-Modified-Since); um 304 mantém a cópia local sem baixar nada.
+    
     Retorna DF com índice 'date' (datetime) e coluna 'FGI' (float).
     """
+    if revalidate and os.path.exists(csv_path):
+        try:
+            with _file_lock(csv_path):
+                _download_csv(FGI_CSV_URL, csv_path, FGI_COLUMNS)
+        except Exception as e:
+            print(f"⚠️ Revalidação do FGI falhou, usando cópia local: {e}")
+
     # PRIORIDADE 1: CSV local
-    if os.path.exists(csv_path):
+    signature = _csv_signature(csv_path)
+    if signature is not None:
         try:
-            fgi = pd.read_csv(csv_path, parse_dates=["date"], index_col="date")
+            fgi = _read_csv_cache(csv_path)
             if not fgi.empty and "FGI" in fgi.columns:
                 fgi["FGI"] = fgi["FGI"].astype(float)
                 print(f"✅ FGI carregado do CSV local ({len(fgi)} dias)")
@@ -35,20 +585,17 @@ def get_fgi_history(csv_path: str = "fear_greed.csv") -> pd.DataFrame:
         except Exception as e:
             print(f"⚠️ Erro ao ler CSV local: {e}")
     
-    # PRIORIDADE 2: GitHub raw URL
+    # PRIORIDADE 2: GitHub raw URL (single-flight: um processo baixa, os demais esperam o lock)
     try:
-        csv_url = "https://raw.githubusercontent.com/Gabrielrr2025/csvexportFGI/refs/heads/main/fear_greed.csv"
-        fgi = pd.read_csv(csv_url, parse_dates=["date"], index_col="date")
+        with _file_lock(csv_path):
+            filled = _csv_signature(csv_path) not in (None, signature)
+            if not filled:
+                fgi = _download_csv(FGI_CSV_URL, csv_path, FGI_COLUMNS, conditional=False)
+        if filled:
+            # Outro processo preencheu o cache enquanto esperávamos
+            fgi = _read_csv_cache(csv_path)
         fgi["FGI"] = fgi["FGI"].astype(float)
         print(f"✅ FGI carregado do GitHub ({len(fgi)} dias)")
-        
-        # Salva localmente para uso futuro
-        try:
-            fgi.to_csv(csv_path)
-            print(f"💾 CSV FGI salvo localmente")
-        except:
-            pass
-            
         return fgi
     except Exception as e:
         print(f"⚠️ Erro ao carregar CSV do GitHub: {e}")
@@ -57,58 +604,101 @@ def get_fgi_history(csv_path: str = "fear_greed.csv") -> pd.DataFrame:
     print("📡 Tentando API alternative.me como fallback...")
     return _fetch_fgi_from_api()
 
-def _fetch_fgi_from_api() -> pd.DataFrame:
+def _fetch_fgi_from_api(limit: int = 0) -> pd.DataFrame:
     """
     Baixa FGI diretamente da API (fallback final).
+    limit: número de dias mais recentes (0 = histórico completo).
     """
     url = "https://api.alternative.me/fng/"
-    params = {"limit": 0, "format": "json"}
-    headers = {"User-Agent": "FGI-Backtest/1.0"}
+    params = {"limit": limit, "format": "json"}
 
+    breaker = SOURCE_HEALTH["alternative.me"]
+    if not breaker.allow():
+        print("⏭️ alternative.me: circuito aberto, pulando")
+        return _empty_fgi_df()
+
+    t0 = time.perf_counter()
     try:
-        r = requests.get(url, params=params, headers=headers, timeout=30)
+        r = _http_get(url, params=params)
         r.raise_for_status()
         payload = r.json()
         data = payload.get("data", [])
-        if not data:
-            return _empty_fgi_df()
-
-        rows = []
-        for d in data:
-            ts = d.get("timestamp")
-            val = d.get("value")
-            if ts is None or val is None:
-                continue
-            
-            try:
-                try:
-                    ts_int = int(ts)
-                    day = pd.to_datetime(ts_int, unit='s').date()
-                except (ValueError, TypeError):
-                    day = pd.to_datetime(str(ts), format="%m-%d-%Y").date()
-                
-                rows.append({"date": pd.to_datetime(day), "FGI": float(val)})
-            except Exception:
-                continue
-
-        if not rows:
+        fgi = _parse_fgi_payload(data) if data else _empty_fgi_df()
+        if fgi.empty:
+            breaker.record_failure(time.perf_counter() - t0, "sem dados")
             return _empty_fgi_df()
 
-        fgi = (
-            pd.DataFrame(rows)
-            .drop_duplicates(subset=["date"])
-            .sort_values("date")
-            .set_index("date")
-        )
-        fgi["FGI"] = fgi["FGI"].astype(float)
+        breaker.record_success(time.perf_counter() - t0)
         print(f"✅ FGI baixado da API ({len(fgi)} dias)")
         return fgi
 
     except Exception as e:
+        breaker.record_failure(time.perf_counter() - t0, e)
         print(f"❌ Erro ao buscar API: {e}")
         return _empty_fgi_df()
 
-def get_btc_history(start: date, end: date, csv_path: str = "btc_prices.csv") -> pd.DataFrame:
+def _parse_fgi_payload(data: list) -> pd.DataFrame:
+    """
+    Converte o array 'data' da API alternative.me de uma vez só (sem laço por registro).
+    timestamp em segundos (int ou string numérica) ou "%m-%d-%Y"; registros sem data
+    ou valor válidos são descartados por máscara. Mantém o primeiro registro de cada dia.
+    """
+    raw = pd.DataFrame(data).reindex(columns=["timestamp", "value"])
+
+    ts = raw["timestamp"]
+    seconds = pd.to_numeric(ts, errors="coerce")
+    dates = pd.to_datetime(seconds, unit="s", errors="coerce")
+    as_text = dates.isna() & ts.notna()
+    if as_text.any():
+        dates[as_text] = pd.to_datetime(ts[as_text].astype(str), format="%m-%d-%Y", errors="coerce")
+    values = pd.to_numeric(raw["value"], errors="coerce").astype(float)
+
+    valid = dates.notna() & values.notna()
+    return (
+        pd.DataFrame({"date": dates[valid].dt.normalize(), "FGI": values[valid]})
+        .drop_duplicates(subset=["date"])
+        .sort_values("date")
+        .set_index("date")
+    )
+
+def _parse_coingecko_prices(prices: list) -> pd.DataFrame:
+    """
+    Converte a lista [[timestamp_ms, preço], ...] do CoinGecko em preços diários (Open = Close).
+    """
+    raw = pd.DataFrame(prices).reindex(columns=[0, 1])
+    dates = pd.to_datetime(pd.to_numeric(raw[0], errors="coerce"), unit="ms", errors="coerce").dt.normalize()
+    price = pd.to_numeric(raw[1], errors="coerce").astype(float)
+
+    valid = dates.notna() & price.notna()
+    return (
+        pd.DataFrame({"date": dates[valid], "Open": price[valid], "Close": price[valid]})
+        .drop_duplicates("date")
+        .set_index("date")
+    )
+
+def _parse_binance_klines(candles: list, interval: str = "1d") -> pd.DataFrame:
+    """
+    Converte klines da Binance ([open_time, open, high, low, close, ...]) de uma vez só.
+    Em "1d" o índice é o dia; nos intervalos intradiários, o horário de abertura.
+    """
+    raw = pd.DataFrame(candles).reindex(columns=[0, 1, 4])
+    dates = pd.to_datetime(pd.to_numeric(raw[0], errors="coerce"), unit="ms", errors="coerce")
+    if interval == "1d":
+        dates = dates.dt.normalize()
+    open_ = pd.to_numeric(raw[1], errors="coerce").astype(float)
+    close = pd.to_numeric(raw[4], errors="coerce").astype(float)
+
+    valid = dates.notna() & open_.notna() & close.notna()
+    return (
+        pd.DataFrame({"date": dates[valid], "Open": open_[valid], "Close": close[valid]})
+        .drop_duplicates("date")
+        .set_index("date")
+        .sort_index()
+    )
+
+def get_btc_history(start: date, end: date, csv_path: str = "btc_prices.csv",
+                    hedged: bool = False, hedge_delay: float = 0.0,
+                    revalidate: bool = False) -> pd.DataFrame:
     """
     Preço diário do BTC-USD com múltiplos fallbacks.
     
@@ -123,6 +713,9 @@ def get_btc_history(start: date, end: date, csv_path: str = "btc_prices.csv") ->
         start: Data inicial
         end: Data final
         csv_path: Caminho do CSV local
+        hedged: Consulta as APIs em paralelo (ver _fetch_btc_from_apis)
+        hedge_delay: Atraso (s) entre o disparo de cada API no modo hedged
+        revalidate: Confere o CSV local com o GitHub via GET condicional antes de usá-lo
     
     Returns:
         DataFrame com colunas ['Open', 'Close'] e índice date
@@ -139,33 +732,37 @@ def get_btc_history(start: date, end: date, csv_path: str = "btc_prices.csv") ->
         end = today
         print(f"⚠️ Data final ajustada para hoje: {end}")
     
+    if revalidate and os.path.exists(csv_path):
+        try:
+            with _file_lock(csv_path):
+                _download_csv(BTC_CSV_URL, csv_path, PRICE_COLUMNS)
+        except Exception as e:
+            print(f"⚠️ Revalidação do BTC falhou, usando cópia local: {e}")
+
     # PRIORIDADE 1: CSV local
-    if os.path.exists(csv_path):
+    signature = _csv_signature(csv_path)
+    if signature is not None:
         try:
-            df = pd.read_csv(csv_path, parse_dates=["date"], index_col="date")
-            if not df.empty:
-                # Filtra pelo período solicitado
-                df_filtered = df.loc[(df.index >= pd.to_datetime(start)) & (df.index <= pd.to_datetime(end))]
-                
-                if len(df_filtered) > 0:
-                    print(f"✅ BTC carregado do CSV local ({len(df_filtered)} dias)")
-                    return df_filtered[["Open", "Close"]]
+            # Recorte direto das partições que cruzam a janela (manifest + busca binária)
+            df_filtered = _read_price_range(csv_path, start, end)
+
+            if len(df_filtered) > 0:
+                print(f"✅ BTC carregado do CSV local ({len(df_filtered)} dias)")
+                return df_filtered
         except Exception as e:
             print(f"⚠️ Erro ao ler CSV local: {e}")
     
-    # PRIORIDADE 2: GitHub raw URL
+    # PRIORIDADE 2: GitHub raw URL (single-flight: um processo baixa, os demais esperam o lock)
     try:
-        csv_url = "https://raw.githubusercontent.com/Gabrielrr2025/exportbtc/refs/heads/main/btc_prices.csv"
-        df = pd.read_csv(csv_url, parse_dates=["date"], index_col="date")
+        with _file_lock(csv_path):
+            filled = _csv_signature(csv_path) not in (None, signature)
+            if not filled:
+                df = _download_csv(BTC_CSV_URL, csv_path, PRICE_COLUMNS, conditional=False)
+        if filled:
+            # Outro processo preencheu o cache enquanto esperávamos
+            df = _read_csv_cache(csv_path)
         
         if not df.empty:
-            # Salva localmente
-            try:
-                df.to_csv(csv_path)
-                print(f"💾 CSV BTC salvo localmente")
-            except:
-                pass
-            
             # Filtra período
             df_filtered = df.loc[(df.index >= pd.to_datetime(start)) & (df.index <= pd.to_datetime(end))]
             
@@ -177,13 +774,108 @@ def get_btc_history(start: date, end: date, csv_path: str = "btc_prices.csv") ->
     
     # PRIORIDADE 3+: APIs (fallback)
     print("📡 CSV não disponível, buscando das APIs...")
-    return _fetch_btc_from_apis(start, end)
+    return _fetch_btc_from_apis(start, end, hedged=hedged, hedge_delay=hedge_delay)
 
-def _fetch_btc_from_apis(start: date, end: date, max_retries: int = 2) -> pd.DataFrame:
+def _fetch_btc_from_apis(start: date, end: date, max_retries: int = 2,
+                         hedged: bool = False, hedge_delay: float = 0.0) -> pd.DataFrame:
     """
-    Fallback: busca BTC de múltiplas APIs.
+    Fallback: busca BTC de múltiplas APIs (Yahoo Finance, CoinGecko, Binance).
+
+    hedged=False: tenta as fontes em sequência, como sempre.
+    hedged=True: dispara as fontes em paralelo num pool de threads, cada uma
+    hedge_delay segundos após a anterior (0 = todas de uma vez; se as já lançadas
+    falharem, a próxima sai na hora). Vale o primeiro resultado válido; as demais
+    são canceladas (se ainda não começaram) ou ignoradas.
+    A latência de cada fonte é registrada no log.
+
+    Fontes com circuito aberto (SOURCE_HEALTH) são puladas e as demais são
+    tentadas da mais saudável/rápida para a mais lenta (ver _rank_sources).
+    """
+    sources = _rank_sources([
+        ("Yahoo Finance", lambda: _fetch_btc_yahoo(start, end, max_retries)),
+        ("CoinGecko", lambda: _fetch_btc_coingecko(start, end)),
+        ("Binance", lambda: _fetch_btc_binance(start, end)),
+    ])
+
+    if hedged and sources:
+        df = _fetch_hedged(sources, hedge_delay)
+        if df is not None:
+            return df
+    else:
+        for name, fetch in sources:
+            df = _timed_fetch(name, fetch)
+            if df is not None:
+                return df
+
+    print("❌ Todas as fontes falharam!")
+    return _empty_btc_df()
+
+def _timed_fetch(name: str, fetch):
+    """
+    Executa uma fonte, registra a latência e retorna o DataFrame se for válido (senão None).
+    O resultado alimenta o disjuntor da fonte; com o circuito aberto nem chama fetch.
+    """
+    breaker = SOURCE_HEALTH[name]
+    if not breaker.allow():
+        print(f"⏭️ {name}: circuito aberto, pulando")
+        return None
+
+    t0 = time.perf_counter()
+    error = "sem dados"
+    try:
+        df = fetch()
+    except Exception as e:
+        print(f"❌ {name} falhou: {str(e)[:80]}")
+        df, error = None, e
+    elapsed = time.perf_counter() - t0
+
+    valid = df is not None and not df.empty and {"Open", "Close"} <= set(df.columns)
+    if valid:
+        breaker.record_success(elapsed)
+    else:
+        breaker.record_failure(elapsed, error)
+    print(f"⏱️ {name}: {elapsed:.2f}s ({'ok' if valid else 'sem dados'})")
+    return df if valid else None
+
+def _fetch_hedged(sources, hedge_delay: float = 0.0):
+    """
+    Corre as fontes em paralelo (escalonadas por hedge_delay) e retorna o primeiro
+    DataFrame válido, ou None se todas falharem.
+    """
+    executor = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="btc-source")
+    pending = {}
+    launched = 0
+    next_launch = time.monotonic()
+    try:
+        while True:
+            now = time.monotonic()
+            if launched < len(sources) and (now >= next_launch or not pending):
+                name, fetch = sources[launched]
+                print(f"🚀 Disparando {name}...")
+                pending[executor.submit(_timed_fetch, name, fetch)] = name
+                launched += 1
+                next_launch = now + hedge_delay
+                if hedge_delay <= 0:
+                    continue
+
+            if not pending:
+                return None
+
+            timeout = max(0.0, next_launch - now) if launched < len(sources) else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                df = future.result()
+                if df is not None:
+                    print(f"✅ Usando {name} ({len(df)} dias)")
+                    return df
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def _fetch_btc_yahoo(start: date, end: date, max_retries: int = 2) -> pd.DataFrame:
+    """
+    Yahoo Finance com retry.
     """
-    # Método 1: Yahoo Finance
     for attempt in range(max_retries):
         try:
             print(f"🔄 Tentativa {attempt + 1}/{max_retries} - Yahoo Finance...")
@@ -206,82 +898,699 @@ def _fetch_btc_from_apis(start: date, end: date, max_retries: int = 2) -> pd.Dat
             if attempt < max_retries - 1:
                 time.sleep(2)
     
-    # Método 2: CoinGecko
-    try:
-        print("🔄 Tentando CoinGecko...")
-        url = "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart/range"
-        
-        start_ts = int(pd.Timestamp(start).timestamp())
-        end_ts = int(pd.Timestamp(end).timestamp())
-        
-        params = {"vs_currency": "usd", "from": start_ts, "to": end_ts}
-        r = requests.get(url, params=params, timeout=30)
+    return _empty_btc_df()
+
+def _fetch_btc_coingecko(start: date, end: date) -> pd.DataFrame:
+    """
+    CoinGecko market_chart/range (preço diário; Open = Close).
+    """
+    print("🔄 Tentando CoinGecko...")
+    url = "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart/range"
+    
+    start_ts = int(pd.Timestamp(start).timestamp())
+    end_ts = int(pd.Timestamp(end).timestamp())
+    
+    params = {"vs_currency": "usd", "from": start_ts, "to": end_ts}
+    r = _http_get(url, params=params)
+    r.raise_for_status()
+    
+    data = r.json().get("prices", [])
+    if not data:
+        return _empty_btc_df()
+
+    df = _parse_coingecko_prices(data)
+    print(f"✅ CoinGecko: {len(df)} dias")
+    return df
+
+BINANCE_INTERVAL_MS = {
+    "1m": 60_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "1h": 3_600_000,
+    "4h": 14_400_000,
+    "1d": 86_400_000,
+}
+BINANCE_WEIGHT_SOFT_LIMIT = 4800  # limite da Binance: 6000 de peso por minuto
+
+def _fetch_btc_binance(start: date, end: date, interval: str = "1d", max_workers: int = 4) -> pd.DataFrame:
+    """
+    Binance klines: o intervalo é dividido em janelas fixas de 1000 candles, baixadas
+    em paralelo por um pool limitado (max_workers) e depois unidas em ordem, sem duplicatas.
+    """
+    print("🔄 Tentando Binance...")
+    step = BINANCE_INTERVAL_MS[interval]
+    
+    start_ts = int(pd.Timestamp(start).timestamp() * 1000)
+    end_ts = int(pd.Timestamp(end).timestamp() * 1000)
+    
+    windows = [
+        (window_start, min(window_start + 1000 * step - 1, end_ts))
+        for window_start in range(start_ts, end_ts + 1, 1000 * step)
+    ]
+    if not windows:
+        return _empty_btc_df()
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(windows)), thread_name_prefix="binance") as pool:
+        batches = list(pool.map(lambda w: _binance_klines(interval, *w), windows))
+
+    all_data = [candle for batch in batches for candle in batch]
+    if not all_data:
+        return _empty_btc_df()
+
+    df = _parse_binance_klines(all_data, interval)
+    print(f"✅ Binance: {len(df)} candles")
+    return df
+
+def _binance_klines(interval: str, start_ms: int, end_ms: int, max_retries: int = 5) -> list:
+    """
+    Uma janela de até 1000 candles. Respeita o rate limit da Binance: em 429/418
+    espera o Retry-After antes de tentar de novo, e desacelera quando o peso usado
+    no minuto (X-MBX-USED-WEIGHT-1M) se aproxima do limite.
+    """
+    url = "https://api.binance.com/api/v3/klines"
+    params = {
+        "symbol": "BTCUSDT",
+        "interval": interval,
+        "startTime": start_ms,
+        "endTime": end_ms,
+        "limit": 1000
+    }
+
+    for attempt in range(max_retries):
+        r = _http_get(url, params=params)
+        if r.status_code in (418, 429):
+            wait_s = float(r.headers.get("Retry-After", 2 ** attempt))
+            print(f"⏳ Binance rate limit ({r.status_code}), aguardando {wait_s:.0f}s...")
+            time.sleep(wait_s)
+            continue
         r.raise_for_status()
-        
-        data = r.json().get("prices", [])
-        if data:
-            rows = []
-            for ts_ms, price in data:
-                day = pd.to_datetime(ts_ms, unit="ms").date()
-                rows.append({"date": pd.to_datetime(day), "Open": float(price), "Close": float(price)})
-            
-            df = pd.DataFrame(rows).drop_duplicates("date").set_index("date")
-            print(f"✅ CoinGecko: {len(df)} dias")
-            return df
+
+        used_weight = int(r.headers.get("X-MBX-USED-WEIGHT-1M", 0))
+        if used_weight > BINANCE_WEIGHT_SOFT_LIMIT:
+            time.sleep(1)
+        return r.json()
+
+    raise RuntimeError(f"Binance: rate limit persistente na janela {start_ms}-{end_ms}")
+
+def update_fgi_cache(csv_path: str = "fear_greed.csv") -> int:
+    """
+    Atualização incremental do CSV local do FGI.
+    Lê só a última data do cache e pede à API apenas os dias que faltam (limit),
+    acrescentando-os ao arquivo de forma atômica.
+
+    Retorna o número de dias adicionados.
+    """
+    # Sob o lock: processos concorrentes não baixam nem anexam os mesmos dias
+    with _file_lock(csv_path):
+        layout = _csv_layout(csv_path)
+        if layout is None:
+            print("⚠️ Cache FGI inexistente: use get_fgi_history para a carga completa")
+            return 0
+
+        last = layout[1]
+        missing = (date.today() - last).days
+        if missing <= 0:
+            print(f"✅ Cache FGI já atualizado ({last})")
+            return 0
+
+        new = _fetch_fgi_from_api(limit=missing + 1)
+        new = new.loc[new.index > pd.to_datetime(last)]
+        return _append_to_csv(csv_path, new, layout)
+
+def update_btc_cache(csv_path: str = "btc_prices.csv") -> int:
+    """
+    Atualização incremental do CSV local do BTC.
+    Busca apenas o intervalo após a última data do cache (Yahoo start, CoinGecko
+    range, Binance startTime) até ontem (último candle diário fechado) e acrescenta
+    as linhas ao arquivo de forma atômica.
+
+    Retorna o número de dias adicionados.
+    """
+    # Sob o lock: processos concorrentes não baixam nem anexam os mesmos dias
+    with _file_lock(csv_path):
+        layout = _csv_layout(csv_path)
+        if layout is None:
+            print("⚠️ Cache BTC inexistente: use get_btc_history para a carga completa")
+            return 0
+
+        last = layout[1]
+        start = last + timedelta(days=1)
+        end = date.today() - timedelta(days=1)
+        if start > end:
+            print(f"✅ Cache BTC já atualizado ({last})")
+            return 0
+
+        new = _fetch_btc_from_apis(start, end)
+        new = new.loc[new.index > pd.to_datetime(last)]
+        return _append_to_csv(csv_path, new, layout)
+
+def _csv_layout(csv_path: str):
+    """
+    Lê só o cabeçalho e o fim do CSV (sem parsear o arquivo inteiro).
+    Retorna (colunas, última data, termina_com_quebra_de_linha, intradiário) ou None
+    se não houver dados; intradiário indica que as datas do CSV trazem horário.
+    """
+    if not os.path.exists(csv_path):
+        return None
+
+    try:
+        with open(csv_path, "rb") as f:
+            header = f.readline().decode("utf-8").strip().split(",")
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - 4096))
+            tail = f.read().decode("utf-8", "ignore")
+
+        lines = [line for line in tail.splitlines() if line.strip()]
+        if "date" not in header or len(lines) < 1:
+            return None
+        last_line = lines[-1].split(",")
+        if last_line == header:
+            return None
+        last_field = last_line[header.index("date")].strip()
+        last = pd.to_datetime(last_field).date()
+        return header, last, tail.endswith("\n"), len(last_field) > 10
     except Exception as e:
-        print(f"❌ CoinGecko falhou: {str(e)[:80]}")
-    
-    # Método 3: Binance
+        print(f"⚠️ Erro ao ler cache {csv_path}: {e}")
+        return None
+
+def _append_to_csv(csv_path: str, new: pd.DataFrame, layout) -> int:
+    """
+    Acrescenta linhas ao CSV: copia para um temporário, anexa e faz rename atômico,
+    então leitores nunca veem um arquivo parcial. Chamar com o lock do CSV.
+    O cache particionado recebe só as linhas novas (ver _update_partitions).
+    """
+    if new is None or new.empty:
+        print("⚠️ Nenhum dado novo para o cache")
+        return 0
+
+    header, _, ends_with_newline, intraday = layout
+    old_signature = _csv_signature(csv_path)
+    rows = new.sort_index().reset_index()
+    dates = pd.to_datetime(rows["date"])
+    # Cache diário continua só com a data; horários (barras intradiárias) vão em ISO
+    if intraday or (dates != dates.dt.normalize()).any():
+        rows["date"] = dates.dt.strftime("%Y-%m-%d %H:%M:%S")
+    else:
+        rows["date"] = dates.dt.strftime("%Y-%m-%d")
+    text = rows.reindex(columns=header).to_csv(header=False, index=False, lineterminator="\n")
+
+    with _atomic_write(csv_path) as f:
+        with open(csv_path, "rb") as src:
+            shutil.copyfileobj(src, f)
+        if not ends_with_newline:
+            f.write(b"\n")
+        f.write(text.encode("utf-8"))
+
     try:
-        print("🔄 Tentando Binance...")
-        url = "https://api.binance.com/api/v3/klines"
-        
-        start_ts = int(pd.Timestamp(start).timestamp() * 1000)
-        end_ts = int(pd.Timestamp(end).timestamp() * 1000)
-        
-        all_data = []
-        current_start = start_ts
-        
-        while current_start < end_ts:
-            params = {
-                "symbol": "BTCUSDT",
-                "interval": "1d",
-                "startTime": current_start,
-                "endTime": end_ts,
-                "limit": 1000
+        _update_partitions(csv_path, new, old_signature)
+    except Exception as e:
+        print(f"⚠️ Não foi possível atualizar as partições de {csv_path}: {e}")
+
+    print(f"💾 {len(rows)} registros adicionados a {csv_path}")
+    return len(rows)
+
+VERSION_ROWS = 64
+
+def data_version(df: pd.DataFrame, rows: int = VERSION_ROWS) -> str:
+    """
+    Versão barata do conteúdo de uma série: hash do número de linhas, das colunas,
+    da primeira data e das últimas `rows` linhas (índice + valores).
+
+    Cobre o caso normal (dias novos anexados, CSV substituído); alterações no meio
+    do histórico que não mudem o tamanho nem o fim não são detectadas.
+    """
+    if df is None or df.empty:
+        return "empty"
+    h = hashlib.sha1(f"{len(df)}|{','.join(map(str, df.columns))}|{df.index[0]}".encode())
+    h.update(pd.util.hash_pandas_object(df.iloc[-rows:], index=True).to_numpy().tobytes())
+    return h.hexdigest()[:16]
+
+def frame_version(df: pd.DataFrame) -> str:
+    """
+    Versão de todo o conteúdo de df (índice + valores), segura para chaves de cache.
+
+    Um df somente leitura (dataset congelado do registro ou recorte dele, ver _freeze)
+    usa a versão pronta em df.attrs["data_version"] mais tamanho e datas extremas
+    (um recorte por iloc herda os attrs do dataset inteiro). Um df gravável é
+    hasheado por inteiro (data_version com todas as linhas): a versão barata não vê
+    correções no meio do histórico, e o pandas copia attrs para frames derivados.
+    """
+    version = df.attrs.get("data_version")
+    if version is not None and len(df) and _is_frozen(df):
+        return combine_versions(version, len(df), df.index[0], df.index[-1])
+    return data_version(df, rows=len(df))
+
+def combine_versions(*parts) -> str:
+    """
+    Versão derivada de outras versões/parâmetros (ex.: FGI + BTC -> painel alinhado).
+    """
+    return hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()[:16]
+
+class StaleWhileRevalidate:
+    """
+    Cache em memória stale-while-revalidate para um loader sem argumentos.
+
+    A primeira chamada de get() carrega de forma bloqueante (warm-up, uma só vez mesmo
+    com chamadas concorrentes). Depois disso get() devolve sempre o último dataset bom
+    na hora; passado o ttl, uma thread em segundo plano recarrega e troca o valor ao
+    terminar. Resultados vazios ou com erro não substituem o último dataset bom, e
+    uma nova tentativa só sai após retry_after segundos.
+    """
+
+    def __init__(self, loader, ttl: float = 3600, retry_after: float = 60, name: str = "dados"):
+        self.loader = loader
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.name = name
+        self._value = None
+        self._loaded_at = None
+        self._attempted_at = None
+        self._refreshing = False
+        self._last_error = None
+        self._last_duration = None
+        self._version = None
+        self._lock = threading.Lock()
+        self._warmup_lock = threading.Lock()
+
+    def get(self):
+        """
+        Último dataset bom (None se o warm-up falhou); dispara refresh se estiver velho.
+        """
+        with self._lock:
+            value = self._value
+        if value is None:
+            with self._warmup_lock:
+                if self._value is None:
+                    self._load()
+            return self._value
+
+        with self._lock:
+            retry_due = self._attempted_at is None or time.time() - self._attempted_at >= self.retry_after
+        if self.age() > self.ttl and retry_due:
+            self.refresh()
+        return value
+
+    def refresh(self, wait: bool = False) -> bool:
+        """
+        Recarrega em segundo plano (no máximo um refresh por vez).
+        Retorna False se já havia um refresh em andamento.
+        """
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+        thread = threading.Thread(target=self._load, name=f"refresh-{self.name}", daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return True
+
+    def _load(self):
+        t0 = time.perf_counter()
+        try:
+            value = self.loader()
+            error = "dataset vazio" if value is None or getattr(value, "empty", False) else None
+        except Exception as e:
+            value, error = None, str(e)
+
+        with self._lock:
+            self._attempted_at = time.time()
+            self._last_duration = time.perf_counter() - t0
+            self._last_error = error
+            if error is None:
+                self._value = value
+                self._version = frame_version(value)
+                self._loaded_at = self._attempted_at
+            self._refreshing = False
+
+        if error is None:
+            print(f"🔄 Cache {self.name} atualizado em {self._last_duration:.2f}s")
+        else:
+            print(f"⚠️ Refresh do cache {self.name} falhou ({error}); mantendo último dataset")
+
+    @property
+    def version(self):
+        """
+        Versão (frame_version) do dataset servido; None antes do warm-up.
+        """
+        with self._lock:
+            return self._version
+
+    def age(self) -> float:
+        """
+        Idade (s) do dataset servido; infinito se ainda não há dataset.
+        """
+        with self._lock:
+            loaded_at = self._loaded_at
+        return float("inf") if loaded_at is None else time.time() - loaded_at
+
+    def status(self) -> dict:
+        """
+        Idade, versão, horário da carga, refresh em andamento e último erro/duração.
+        """
+        age = self.age()
+        with self._lock:
+            return {
+                "name": self.name,
+                "version": self._version,
+                "age_seconds": None if age == float("inf") else age,
+                "loaded_at": None if self._loaded_at is None else datetime.fromtimestamp(self._loaded_at),
+                "stale": age > self.ttl,
+                "refreshing": self._refreshing,
+                "last_error": self._last_error,
+                "last_duration": self._last_duration,
             }
-            
-            r = requests.get(url, params=params, timeout=30)
-            r.raise_for_status()
-            batch = r.json()
-            
-            if not batch:
-                break
-            
-            all_data.extend(batch)
-            current_start = batch[-1][0] + 86400000
-            
-            if len(batch) < 1000:
-                break
-        
-        if all_data:
-            rows = []
-            for candle in all_data:
-                day = pd.to_datetime(candle[0], unit="ms").date()
-                rows.append({"date": pd.to_datetime(day), "Open": float(candle[1]), "Close": float(candle[4])})
-            
-            df = pd.DataFrame(rows).drop_duplicates("date").set_index("date")
-            print(f"✅ Binance: {len(df)} dias")
+
+def _nbytes(value) -> int:
+    """
+    Estimativa da memória (bytes) de um resultado: DataFrames/Series, arrays,
+    payloads binários (ex.: arquivos de exportação) e containers com eles dentro.
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return value.nbytes if isinstance(value, memoryview) else len(value)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(v) for v in value)
+    return 64
+
+class LRUCache:
+    """
+    Cache LRU limitado por memória (max_bytes, estimada por _nbytes).
+
+    get_or_compute(key, compute) devolve o valor guardado ou calcula e guarda; ao
+    passar do limite os itens usados há mais tempo são descartados. key=None não
+    usa o cache. Contadores de hits/misses/evictions ficam em status().
+    """
+
+    def __init__(self, max_bytes: int, name: str = "cache"):
+        self.max_bytes = max_bytes
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        if key is None:
+            return compute()
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key][0]
+            self.misses += 1
+
+        value = compute()
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            if key in self._items:
+                self._bytes -= self._items.pop(key)[1]
+            self._items[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def status(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "items": len(self._items),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else None,
+            }
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+def _is_frozen(df: pd.DataFrame) -> bool:
+    """
+    True se os valores de df não podem ser alterados (datasets do registro, ver _freeze).
+    """
+    return all(not df[c].to_numpy().flags.writeable for c in df.columns)
+
+def _freeze(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cópia somente leitura de um DataFrame numérico: índice ordenado, um único bloco
+    float64 contíguo e arrays com writeable=False (qualquer escrita levanta ValueError).
+    Recortes por iloc são views desse bloco, sem cópia.
+    """
+    if not all(pd.api.types.is_numeric_dtype(t) for t in df.dtypes):
+        raise ValueError("Só DataFrames numéricos podem ir para o registro")
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    values = _readonly(np.array(df.to_numpy(dtype=np.float64), order="C"))
+    index = _readonly(df.index.to_numpy(dtype="datetime64[ns]").copy())
+    frozen = pd.DataFrame(values, index=pd.DatetimeIndex(index, name=df.index.name),
+                          columns=df.columns, copy=False)
+    frozen.attrs["data_version"] = data_version(frozen, rows=len(frozen))
+    return frozen
+
+class DatasetRegistry:
+    """
+    Registro de datasets do processo, compartilhado por todas as sessões do app.
+
+    Cada dataset é guardado uma única vez, congelado (_freeze); as sessões recebem
+    o mesmo objeto ou views dele, então a memória não cresce com o número de sessões.
+    Publicar de novo a mesma versão devolve o objeto já registrado.
+    """
+
+    def __init__(self):
+        self._datasets = {}
+        self._lock = threading.Lock()
+
+    def publish(self, name: str, df: pd.DataFrame) -> pd.DataFrame:
+        if df is None or df.empty:
             return df
-    except Exception as e:
-        print(f"❌ Binance falhou: {str(e)[:80]}")
-    
-    print("❌ Todas as fontes falharam!")
-    return _empty_btc_df()
+        version = data_version(df, rows=len(df))
+        with self._lock:
+            current = self._datasets.get(name)
+            if current is not None and current.attrs["data_version"] == version:
+                return current
+        frozen = _freeze(df)
+        with self._lock:
+            self._datasets[name] = frozen
+        return frozen
+
+    def get(self, name: str):
+        with self._lock:
+            return self._datasets.get(name)
+
+    def status(self) -> list:
+        """
+        Nome, versão, linhas e bytes de cada dataset registrado.
+        """
+        with self._lock:
+            items = list(self._datasets.items())
+        return [
+            {"name": name, "version": df.attrs["data_version"], "rows": len(df),
+             "nbytes": int(df.memory_usage(index=True).sum())}
+            for name, df in items
+        ]
+
+datasets = DatasetRegistry()
+
+BTC_HISTORY_START = date(2010, 1, 1)
+
+def _load_fgi_latest(csv_path: str = "fear_greed.csv") -> pd.DataFrame:
+    """
+    Traz o cache local do FGI em dia (só os dias que faltam), carrega o histórico
+    e o publica (somente leitura) no registro de datasets do processo.
+    """
+    if os.path.exists(csv_path):
+        update_fgi_cache(csv_path)
+    return datasets.publish("fgi", get_fgi_history(csv_path))
 
-def align_series(fgi: pd.DataFrame, px: pd.DataFrame, start: date, end: date) -> pd.DataFrame:
+def _load_btc_latest(csv_path: str = "btc_prices.csv") -> pd.DataFrame:
+    """
+    Traz o cache local do BTC em dia (só os dias que faltam), carrega o histórico
+    inteiro e o publica (somente leitura) no registro de datasets do processo.
+    """
+    if os.path.exists(csv_path):
+        update_btc_cache(csv_path)
+    return datasets.publish("btc", get_btc_history(BTC_HISTORY_START, date.today(), csv_path))
+
+fgi_cache = StaleWhileRevalidate(_load_fgi_latest, ttl=3600, name="FGI")
+btc_cache = StaleWhileRevalidate(_load_btc_latest, ttl=3600, name="BTC")
+
+def get_fgi_cached() -> pd.DataFrame:
+    """
+    FGI servido do cache stale-while-revalidate (não bloqueia na rede após o warm-up).
+    """
+    fgi = fgi_cache.get()
+    return _empty_fgi_df() if fgi is None else fgi
+
+def get_btc_cached(start: date, end: date) -> pd.DataFrame:
+    """
+    Recorte [start, end] do histórico de BTC servido do cache stale-while-revalidate.
+    É uma view somente leitura do dataset compartilhado (sem cópia por sessão).
+    """
+    btc = btc_cache.get()
+    if btc is None:
+        return _empty_btc_df()
+    lo = btc.index.searchsorted(pd.Timestamp(start), side="left")
+    hi = btc.index.searchsorted(pd.Timestamp(end), side="right")
+    return btc.iloc[lo:hi]
+
+def cache_status() -> list:
+    """
+    Status (idade, refresh em andamento, último erro) dos caches de dados.
+    """
+    return [fgi_cache.status(), btc_cache.status()]
+
+PANEL_PATH = "aligned_panel.npz"
+PANEL_COLUMNS = ("Open", "Close", "FGI")
+
+class AlignedPanel:
+    """
+    Painel materializado Open/Close/FGI num índice diário comum (inner join das séries).
+
+    Montado uma vez por versão dos dados e recortado por data com busca binária
+    (searchsorted) no índice, sem refazer o join a cada backtest.
+    """
+
+    def __init__(self, index: np.ndarray, values: np.ndarray, version: str):
+        # Somente leitura: os recortes entregues às sessões são views destes arrays
+        self.index = _readonly(index)
+        self.values = _readonly(values)  # (n, 3) float64 nas colunas de PANEL_COLUMNS
+        self.version = version
+
+    @classmethod
+    def build(cls, fgi: pd.DataFrame, px: pd.DataFrame, version: str):
+        print("🔗 Alinhando séries...")
+        print(f"   FGI: {len(fgi)} dias ({fgi.index.min().date()} - {fgi.index.max().date()})")
+        print(f"   BTC: {len(px)} dias ({px.index.min().date()} - {px.index.max().date()})")
+
+        df = px[["Open", "Close"]].join(fgi[["FGI"]], how="inner")
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
+        print(f"   Após join: {len(df)} dias")
+
+        return cls(
+            df.index.to_numpy(dtype="datetime64[ns]").copy(),
+            np.array(df[list(PANEL_COLUMNS)].to_numpy(dtype=np.float64), order="C"),
+            version,
+        )
+
+    def __len__(self):
+        return len(self.index)
+
+    def slice(self, start, end) -> pd.DataFrame:
+        """
+        Recorte [start, end] do painel como DataFrame (índice 'date'), view somente leitura.
+        A versão do recorte (painel + linhas) vai em df.attrs["data_version"].
+        """
+        lo = self.index.searchsorted(np.datetime64(pd.Timestamp(start), "ns"), side="left")
+        hi = self.index.searchsorted(np.datetime64(pd.Timestamp(end), "ns"), side="right")
+        df = pd.DataFrame(
+            self.values[lo:hi],
+            index=pd.DatetimeIndex(self.index[lo:hi], name="date"),
+            columns=list(PANEL_COLUMNS),
+            copy=False,
+        )
+        df.attrs["data_version"] = combine_versions(self.version, lo, hi)
+        return df
+
+    def save(self, path: str = PANEL_PATH):
+        with _atomic_write(path) as f:
+            np.savez(f, _version=np.array(self.version), _date=self.index, _values=self.values)
+
+    @classmethod
+    def load(cls, path: str = PANEL_PATH, version: str = None):
+        """
+        Lê o painel do disco; None se não existir, estiver corrompido ou for de outra versão.
+        """
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                stored = str(npz["_version"])
+                if version is not None and stored != version:
+                    return None
+                return cls(npz["_date"], npz["_values"], stored)
+        except (OSError, ValueError, KeyError):
+            return None
+
+PANEL_CACHE_SIZE = 4  # painéis (versões de dados) mantidos em memória
+_panels = OrderedDict()
+_panel_sources = (None, None, None)  # (fgi, px, painel) da última chamada
+_panel_lock = threading.Lock()
+
+def get_aligned_panel(fgi: pd.DataFrame, px: pd.DataFrame, path: str = None) -> AlignedPanel:
+    """
+    Painel alinhado para (fgi, px), reaproveitado da memória (os PANEL_CACHE_SIZE
+    mais recentes) ou do disco enquanto a versão dos dados (frame_version de cada
+    série, que cobre o conteúdo inteiro) for a mesma; o join só roda quando ela muda.
+
+    path: arquivo .npz onde o painel é persistido entre processos (ex.: PANEL_PATH);
+    None (padrão) não lê nem grava nada em disco.
+    """
+    global _panel_sources
+    with _panel_lock:
+        # Mesmos objetos somente leitura da última chamada (ex.: servidos pelos caches
+        # SWR): o conteúdo não pode ter mudado, nem re-hasheia
+        last_fgi, last_px, last_panel = _panel_sources
+        if last_panel is not None and last_fgi is fgi and last_px is px and _is_frozen(fgi) and _is_frozen(px):
+            return last_panel
+
+        version = combine_versions(frame_version(fgi), frame_version(px))
+        panel = _panels.get(version)
+        if panel is None and path:
+            panel = AlignedPanel.load(path, version)
+            if panel is not None:
+                print(f"✅ Painel alinhado carregado de {path} ({len(panel)} dias)")
+        if panel is None:
+            panel = AlignedPanel.build(fgi, px, version)
+            if path:
+                try:
+                    panel.save(path)
+                except OSError as e:
+                    print(f"⚠️ Não foi possível salvar o painel alinhado: {e}")
+
+        _panels[version] = panel
+        _panels.move_to_end(version)
+        while len(_panels) > PANEL_CACHE_SIZE:
+            _panels.popitem(last=False)
+        _panel_sources = (fgi, px, panel)
+        return panel
+
+def get_aligned_cached(start: date, end: date, path: str = None) -> pd.DataFrame:
+    """
+    Recorte [start, end] do painel alinhado sobre os históricos completos dos caches
+    stale-while-revalidate (o painel só é remontado quando um deles é recarregado).
+    path: ver get_aligned_panel.
+    """
+    return align_series(get_fgi_cached(), btc_cache.get(), start, end, path)
+
+def align_series(fgi: pd.DataFrame, px: pd.DataFrame, start: date, end: date, path: str = None) -> pd.DataFrame:
     """
     Alinha séries por data (inner join) e recorta intervalo solicitado.
+    O join é materializado uma vez por versão dos dados (ver get_aligned_panel);
+    com path o painel também é persistido em disco.
     """
     if fgi is None or fgi.empty:
         print("❌ DataFrame FGI vazio")
@@ -291,15 +1600,7 @@ def align_series(fgi: pd.DataFrame, px: pd.DataFrame, start: date, end: date) ->
         print("❌ DataFrame BTC vazio")
         return pd.DataFrame(columns=["Open", "Close", "FGI"])
     
-    print(f"🔗 Alinhando séries...")
-    print(f"   FGI: {len(fgi)} dias ({fgi.index.min().date()} - {fgi.index.max().date()})")
-    print(f"   BTC: {len(px)} dias ({px.index.min().date()} - {px.index.max().date()})")
-    
-    df = px.join(fgi, how="inner")
-    print(f"   Após join: {len(df)} dias")
-    
-    df = df.loc[(df.index >= pd.to_datetime(start)) & (df.index <= pd.to_datetime(end))]
-    print(f"   Após filtro: {len(df)} dias")
+    df = get_aligned_panel(fgi, px, path).slice(start, end)
     
     if df.empty:
         print("⚠️ Vazio após alinhamento. Verifique sobreposição de datas.")
@@ -0,0 +1,72 @@
+import io
+import zipfile
+
+import pandas as pd
+from openpyxl import Workbook
+
+# Formato -> (extensão, MIME)
+EXPORT_FORMATS = {
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "CSV (zip)": ("zip", "application/zip"),
+}
+WRITE_ONLY_ROWS = 20_000     # acima disso o Excel é gravado em modo write-only (streaming)
+LARGE_EXPORT_ROWS = 200_000  # acima disso o app sugere o CSV (zip) como padrão
+
+def build_export(fmt: str, results: pd.DataFrame, trades: pd.DataFrame, df: pd.DataFrame) -> bytes:
+    """
+    Arquivo de exportação (Resumo, Trades e Dados) em memória, no formato pedido.
+    """
+    if fmt == "Excel":
+        return excel_bytes(results, trades, df)
+    if fmt == "CSV (zip)":
+        return csv_zip_bytes(results, trades, df)
+    raise ValueError(f"Formato desconhecido: {fmt!r} (use {', '.join(EXPORT_FORMATS)})")
+
+def _sheets(results, trades, df):
+    # (nome da aba, DataFrame, grava o índice?)
+    return [("Resumo", results, False), ("Trades", trades, False), ("Dados", df, True)]
+
+def excel_bytes(results: pd.DataFrame, trades: pd.DataFrame, df: pd.DataFrame, write_only: bool = None) -> bytes:
+    """
+    Excel em um BytesIO (nada vai para o disco).
+
+    write_only=None decide pelo tamanho: com mais de WRITE_ONLY_ROWS linhas usa o
+    modo write-only do openpyxl, que grava as linhas em streaming sem montar a
+    planilha inteira em memória.
+    """
+    if write_only is None:
+        write_only = sum(len(frame) for _, frame, _ in _sheets(results, trades, df)) > WRITE_ONLY_ROWS
+
+    buffer = io.BytesIO()
+    if not write_only:
+        with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+            for name, frame, index in _sheets(results, trades, df):
+                frame.to_excel(writer, sheet_name=name, index=index)
+        return buffer.getvalue()
+
+    wb = Workbook(write_only=True)
+    for name, frame, index in _sheets(results, trades, df):
+        _write_only_sheet(wb.create_sheet(name), frame, index)
+    wb.save(buffer)
+    return buffer.getvalue()
+
+def _write_only_sheet(ws, frame: pd.DataFrame, index: bool):
+    """
+    Cabeçalho + linhas de frame numa aba write-only (NaN vira célula vazia).
+    """
+    header = list(map(str, frame.columns))
+    if index:
+        header.insert(0, frame.index.name or "")
+    ws.append(header)
+    for row in frame.itertuples(index=index, name=None):
+        ws.append([None if isinstance(v, float) and v != v else v for v in row])
+
+def csv_zip_bytes(results: pd.DataFrame, trades: pd.DataFrame, df: pd.DataFrame) -> bytes:
+    """
+    Caminho rápido para períodos grandes: um CSV por aba, compactados num zip.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, frame, index in _sheets(results, trades, df):
+            zf.writestr(f"{name.lower()}.csv", frame.to_csv(index=index))
+    return buffer.getvalue()
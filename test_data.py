@@ -0,0 +1,146 @@
+import json
+import threading
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+import data
+
+FGI_CSV = b"date,FGI\n2024-01-01,25\n2024-01-02,30\n2024-01-03,75\n"
+FGI_CSV_NEW = FGI_CSV + b"2024-01-04,80\n"
+BTC_CSV = b"date,Open,Close\n2024-01-01,100.0,110.0\n2024-01-02,110.0,105.0\n2024-01-03,105.0,120.0\n"
+HTML_BODY = b"<html><body>502 Bad Gateway</body></html>"
+
+
+class MirrorHandler(BaseHTTPRequestHandler):
+    """
+    Espelho local do GitHub raw: serve server.files[path] = (corpo, etag) com
+    suporte a If-None-Match; server.status força um código de erro.
+    """
+
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers))
+        if self.server.status is not None:
+            self.send_response(self.server.status)
+            self.end_headers()
+            return
+        body, etag = self.server.files[self.path]
+        if etag is not None and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def mirror(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MirrorHandler)
+    server.files = {"/fear_greed.csv": (FGI_CSV, '"fgi-v1"'), "/btc_prices.csv": (BTC_CSV, '"btc-v1"')}
+    server.status = None
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(data, "FGI_CSV_URL", f"{base}/fear_greed.csv")
+    monkeypatch.setattr(data, "BTC_CSV_URL", f"{base}/btc_prices.csv")
+    # Disjuntor novo a cada teste: falhas de um teste não abrem o circuito do próximo
+    monkeypatch.setitem(data.SOURCE_HEALTH, "GitHub", data.CircuitBreaker("GitHub"))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _validators(csv_path):
+    with open(f"{csv_path}.http.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_fgi_download_saves_csv_and_validators(mirror, tmp_path):
+    csv_path = str(tmp_path / "fear_greed.csv")
+
+    fgi = data.get_fgi_history(csv_path)
+
+    assert list(fgi["FGI"]) == [25.0, 30.0, 75.0]
+    with open(csv_path, "rb") as f:
+        assert f.read() == FGI_CSV
+    assert _validators(csv_path)["etag"] == '"fgi-v1"'
+
+
+def test_revalidate_304_keeps_local_copy(mirror, tmp_path):
+    csv_path = str(tmp_path / "fear_greed.csv")
+    data.get_fgi_history(csv_path)
+
+    fgi = data.get_fgi_history(csv_path, revalidate=True)
+
+    assert mirror.requests[-1].get("If-None-Match") == '"fgi-v1"'
+    assert len(fgi) == 3
+    with open(csv_path, "rb") as f:
+        assert f.read() == FGI_CSV
+
+
+def test_revalidate_200_replaces_local_copy(mirror, tmp_path):
+    csv_path = str(tmp_path / "fear_greed.csv")
+    data.get_fgi_history(csv_path)
+    mirror.files["/fear_greed.csv"] = (FGI_CSV_NEW, '"fgi-v2"')
+
+    fgi = data.get_fgi_history(csv_path, revalidate=True)
+
+    assert len(fgi) == 4
+    assert _validators(csv_path)["etag"] == '"fgi-v2"'
+
+
+def test_revalidate_failure_keeps_local_copy(mirror, tmp_path):
+    csv_path = str(tmp_path / "fear_greed.csv")
+    data.get_fgi_history(csv_path)
+    mirror.status = 500
+
+    fgi = data.get_fgi_history(csv_path, revalidate=True)
+
+    assert len(fgi) == 3
+    assert _validators(csv_path)["etag"] == '"fgi-v1"'
+    assert data.SOURCE_HEALTH["GitHub"].status()["failures"] == 1
+
+
+def test_revalidate_invalid_body_keeps_local_copy(mirror, tmp_path):
+    csv_path = str(tmp_path / "fear_greed.csv")
+    data.get_fgi_history(csv_path)
+    mirror.files["/fear_greed.csv"] = (HTML_BODY, '"html"')
+
+    fgi = data.get_fgi_history(csv_path, revalidate=True)
+
+    assert len(fgi) == 3
+    with open(csv_path, "rb") as f:
+        assert f.read() == FGI_CSV
+    assert _validators(csv_path)["etag"] == '"fgi-v1"'
+
+
+def test_download_rejects_missing_columns(mirror, tmp_path):
+    csv_path = str(tmp_path / "btc_prices.csv")
+    mirror.files["/btc_prices.csv"] = (FGI_CSV, None)
+
+    with pytest.raises(ValueError):
+        data._download_csv(data.BTC_CSV_URL, csv_path, data.PRICE_COLUMNS)
+
+    assert not (tmp_path / "btc_prices.csv").exists()
+
+
+def test_btc_download_and_revalidate(mirror, tmp_path):
+    csv_path = str(tmp_path / "btc_prices.csv")
+
+    btc = data.get_btc_history(date(2024, 1, 1), date(2024, 1, 2), csv_path)
+    assert list(btc["Close"]) == [110.0, 105.0]
+
+    btc = data.get_btc_history(date(2024, 1, 1), date(2024, 1, 3), csv_path, revalidate=True)
+    assert mirror.requests[-1].get("If-None-Match") == '"btc-v1"'
+    assert list(btc.index) == list(pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"]))